@@ -4,10 +4,18 @@ echo ""
 echo "Make sure you have installed all dependencies:"
 echo "  pip install -r requirements.txt"
 echo ""
-echo "Starting Flask server on http://localhost:5000"
+echo "Starting server on http://localhost:5000"
 echo "Press Ctrl+C to stop the server"
 echo ""
-python3 web_server.py
+if command -v gunicorn >/dev/null 2>&1; then
+    # Worker pool scales CPU-bound detection across cores; --preload
+    # loads the detectors once and shares them copy-on-write
+    gunicorn --workers 4 --threads 2 --preload --timeout 30 \
+        --bind 0.0.0.0:5000 wsgi:app
+else
+    echo "gunicorn not found, falling back to the Flask dev server"
+    python3 web_server.py
+fi
 
 
 
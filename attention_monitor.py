@@ -5,10 +5,58 @@ Monitors user attention and sends warnings when user looks away or is not in scr
 
 import cv2
 import numpy as np
+import time
+from collections import deque
+from dataclasses import dataclass
 from typing import Dict, List, Optional
 from face_detection import FaceRecognition
 from sleep_detection import SleepDetection
 
+# Optional: Numba JIT-compiles the per-frame classification arithmetic
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Fallback no-op decorator when numba is not installed"""
+        if args and callable(args[0]):
+            return args[0]
+
+        def decorator(func):
+            return func
+        return decorator
+
+# Enum-coded attention status returned by _classify_attention
+STATUS_ATTENTIVE = 0
+STATUS_LOOKING_AWAY = 1
+
+# Head offset beyond this counts as looking away
+# (mirrors the tilt/nod threshold in SleepDetection.detect_head_position)
+HEAD_OFFSET_THRESHOLD = 0.3
+
+
+@njit(cache=True)
+def _classify_attention(offset_x: float, offset_y: float, is_drowsy: bool) -> int:
+    """Classify attention from head offset and drowsiness (hot path)"""
+    if is_drowsy:
+        return STATUS_LOOKING_AWAY
+    if abs(offset_x) > HEAD_OFFSET_THRESHOLD or abs(offset_y) > HEAD_OFFSET_THRESHOLD:
+        return STATUS_LOOKING_AWAY
+    return STATUS_ATTENTIVE
+
+
+@dataclass(slots=True)
+class AttentionResult:
+    """Per-frame attention status
+
+    A single instance is reused across check_attention calls to avoid
+    allocating a fresh result every frame; copy it if you need to keep
+    a result beyond the next call.
+    """
+    face_detected: bool = False
+    looking_at_screen: bool = False
+    attention_level: int = 0
+    warning: Optional[Dict] = None
+
 
 class AttentionMonitor:
     """Monitor user attention and detect when they look away"""
@@ -30,83 +78,103 @@ class AttentionMonitor:
         
         self.no_face_counter = 0
         self.look_away_counter = 0
-        self.warnings = []
-    
-    def check_attention(self, frame: np.ndarray) -> Dict:
+        # Bounded so a long-running kiosk session can't grow without limit
+        self.warnings = deque(maxlen=1024)
+
+        # Warning payloads are constant; build them once instead of per frame
+        self._warning_no_face = {
+            'type': 'no_face',
+            'message': '⚠️ Warning: You are not visible on screen. Please return to your seat.',
+            'severity': 'high'
+        }
+        self._warning_look_away = {
+            'type': 'look_away',
+            'message': '⚠️ Warning: Please focus on the screen and pay attention to the class.',
+            'severity': 'medium'
+        }
+
+        # Reused result object (see AttentionResult docstring)
+        self._result = AttentionResult()
+
+    def check_attention(self, frame: np.ndarray) -> AttentionResult:
         """
         Check user attention in frame
-        
+
         Args:
             frame: Input frame (BGR format)
-            
+
         Returns:
-            Dictionary with attention status and warnings
+            AttentionResult with attention status and warnings
+            (reused between calls; copy to retain)
         """
         face_results = self.face_detector.process_frame(frame)
-        sleep_results = self.sleep_detector.process_frame(frame)
-        
-        result = {
-            'face_detected': len(face_results) > 0,
-            'looking_at_screen': False,
-            'attention_level': 0,
-            'warning': None
-        }
-        
+
+        result = self._result
+        result.face_detected = len(face_results) > 0
+        result.looking_at_screen = False
+        result.attention_level = 0
+        result.warning = None
+
         if not face_results:
             # No face detected
             self.no_face_counter += 1
             self.look_away_counter = 0
             
             if self.no_face_counter >= self.warning_threshold_no_face:
-                result['warning'] = {
-                    'type': 'no_face',
-                    'message': '⚠️ Warning: You are not visible on screen. Please return to your seat.',
-                    'severity': 'high'
-                }
-                self.warnings.append(result['warning'])
+                result.warning = self._warning_no_face
+                self._record_warning(result.warning)
                 self.no_face_counter = 0  # Reset after warning
         else:
-            # Face detected
+            # Face detected; analyze sleep only now and reuse the known
+            # bbox so the sleep module skips its own detection pass
             self.no_face_counter = 0
-            
-            if sleep_results:
-                sleep_result = sleep_results[0]
+
+            sleep_result = self.sleep_detector.analyze_face(
+                frame, face_results[0]['bbox']
+            )
+            if sleep_result:
                 head_position = sleep_result.get('head_position', {})
                 drowsiness = sleep_result.get('drowsiness', {})
-                
-                tilt = head_position.get('tilt', 'center')
-                nod = head_position.get('nod', 'center')
+
+                offset_x, offset_y = head_position.get('offset', (0.0, 0.0))
                 is_drowsy = drowsiness.get('is_drowsy', False)
-                
-                # Check if looking away
-                if tilt != 'center' or nod != 'center' or is_drowsy:
+
+                # Classify attention numerically (JIT-compiled when numba is available)
+                status = _classify_attention(offset_x, offset_y, is_drowsy)
+
+                if status == STATUS_LOOKING_AWAY:
                     self.look_away_counter += 1
-                    
+
                     if self.look_away_counter >= self.warning_threshold_look_away:
-                        result['warning'] = {
-                            'type': 'look_away',
-                            'message': '⚠️ Warning: Please focus on the screen and pay attention to the class.',
-                            'severity': 'medium'
-                        }
-                        self.warnings.append(result['warning'])
+                        result.warning = self._warning_look_away
+                        self._record_warning(result.warning)
                         self.look_away_counter = 0  # Reset after warning
                 else:
                     # Looking at screen
-                    result['looking_at_screen'] = True
-                    result['attention_level'] = 100
+                    result.looking_at_screen = True
+                    result.attention_level = 100
                     self.look_away_counter = 0
         
         return result
     
+    def _record_warning(self, warning: Dict):
+        """Record a warning with the time it fired
+
+        The per-frame payloads are shared constant dicts, so each
+        recorded entry gets its own copy plus a timestamp - every
+        occurrence is kept, not just the first of a run.
+        """
+        self.warnings.append({**warning, 'timestamp': time.time()})
+
     def get_warnings(self) -> List[Dict]:
         """Get all warnings generated"""
-        return self.warnings
-    
+        return list(self.warnings)
+
     def reset(self):
         """Reset counters and warnings"""
         self.no_face_counter = 0
         self.look_away_counter = 0
-        self.warnings = []
+        self.warnings.clear()
 
 
 
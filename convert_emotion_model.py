@@ -0,0 +1,57 @@
+"""
+Convert a Keras emotion model to an int8-quantized TFLite model
+Quantized models are ~4x smaller and run 2-4x faster on CPU
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+
+
+def representative_dataset(sample_dir):
+    """Yield sample face crops for full-integer quantization calibration"""
+    for filename in os.listdir(sample_dir):
+        if not filename.lower().endswith(('.jpg', '.jpeg', '.png')):
+            continue
+        image = cv2.imread(os.path.join(sample_dir, filename), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            continue
+        face = cv2.resize(image, (48, 48)).astype(np.float32) / 255.0
+        yield [face[np.newaxis, ..., np.newaxis]]
+
+
+def convert(keras_model_path, tflite_model_path, sample_dir=None):
+    """
+    Convert a Keras model to quantized TFLite
+
+    Args:
+        keras_model_path: Path to the trained Keras model (.h5 or SavedModel)
+        tflite_model_path: Output path for the .tflite model
+        sample_dir: Optional directory of sample face images used for
+            full-integer quantization calibration
+    """
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(keras_model_path)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if sample_dir and os.path.isdir(sample_dir):
+        converter.representative_dataset = lambda: representative_dataset(sample_dir)
+
+    tflite_model = converter.convert()
+    with open(tflite_model_path, 'wb') as f:
+        f.write(tflite_model)
+
+    print(f"Saved quantized model to {tflite_model_path}")
+    print(f"Size: {os.path.getsize(tflite_model_path) / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python convert_emotion_model.py <keras_model> <output.tflite> [sample_faces_dir]")
+        sys.exit(1)
+
+    convert(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
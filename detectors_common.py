@@ -0,0 +1,223 @@
+"""
+Shared Detector Resources
+Caches Haar cascade instances and OpenCL state across detection modules,
+and holds the face detection and tracker-throttling logic they share
+"""
+
+import functools
+
+import cv2
+
+
+@functools.lru_cache(maxsize=None)
+def get_cascade(name: str) -> "cv2.CascadeClassifier":
+    """
+    Load a Haar cascade once and share the instance across modules
+
+    Cascade loading parses the XML and builds lookup tables; modules
+    that need the same cascade should share one instance instead of
+    each paying that cost and memory.
+
+    Args:
+        name: Cascade file name inside cv2.data.haarcascades
+
+    Returns:
+        Shared CascadeClassifier instance
+    """
+    return cv2.CascadeClassifier(cv2.data.haarcascades + name)
+
+
+@functools.lru_cache(maxsize=None)
+def opencl_enabled() -> bool:
+    """Enable OpenCV's OpenCL backend once, if the platform has one"""
+    if cv2.ocl.haveOpenCL():
+        cv2.ocl.setUseOpenCL(True)
+        return True
+    return False
+
+
+@functools.lru_cache(maxsize=None)
+def dnn_backend_target() -> "tuple":
+    """
+    Pick the preferred DNN backend/target pair for OpenCV networks
+
+    Prefers the CUDA backend with FP16 tensors when OpenCV was built
+    with CUDA support and a device is present; convolution-heavy models
+    like YuNet then run on the GPU instead of the CPU SIMD path.
+
+    Returns:
+        Tuple of (backend_id, target_id) for cv2.dnn
+    """
+    try:
+        if cv2.cuda.getCudaEnabledDeviceCount() > 0:
+            return (cv2.dnn.DNN_BACKEND_CUDA, cv2.dnn.DNN_TARGET_CUDA_FP16)
+    except (cv2.error, AttributeError):
+        pass
+    return (cv2.dnn.DNN_BACKEND_DEFAULT, cv2.dnn.DNN_TARGET_CPU)
+
+
+def maybe_umat(image):
+    """
+    Wrap an image in a UMat so downstream ops can run via OpenCL
+
+    Args:
+        image: Grayscale or BGR ndarray
+
+    Returns:
+        cv2.UMat when OpenCL is available, otherwise the input unchanged
+    """
+    if opencl_enabled():
+        return cv2.UMat(image)
+    return image
+
+
+def _clamp_bbox(bbox, shape):
+    """
+    Clamp an (x, y, w, h) box to the frame bounds
+
+    YuNet emits negative x/y for faces touching the frame edge, trackers
+    drift off-frame, and the cascade upmapping can overshoot by a pixel;
+    a negative coordinate reaching the gray-crop slicing wraps around
+    and yields an empty crop that crashes downstream cv2 calls.
+
+    Args:
+        bbox: Bounding box (x, y, w, h), any numeric type
+        shape: Frame shape (height, width, ...)
+
+    Returns:
+        Clamped integer (x, y, w, h), or None if no area remains
+    """
+    x, y, w, h = (int(v) for v in bbox)
+    frame_h, frame_w = shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, frame_w), min(y + h, frame_h)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def detect_faces(ctx, yunet, cascade, scale: float = 1.0):
+    """
+    Detect face bounding boxes with YuNet, falling back to a Haar cascade
+
+    The cascade path optionally runs on a downscaled copy of the gray
+    frame; sliding-window cost scales with pixel count, so scale=0.5
+    cuts the work roughly 4x, with the boxes mapped back to full
+    resolution.
+
+    Args:
+        ctx: FrameContext for the current frame
+        yunet: cv2.FaceDetectorYN instance, or None to use the cascade
+        cascade: Shared Haar face cascade (see get_cascade)
+        scale: Downscale factor for cascade detection (1.0 = full size)
+
+    Returns:
+        List of face bounding boxes (x, y, w, h) at frame resolution
+    """
+    shape = ctx.bgr.shape
+    if yunet is not None:
+        # YuNet works on the BGR frame directly; no gray conversion
+        yunet.setInputSize((shape[1], shape[0]))
+        _, detections = yunet.detect(ctx.bgr)
+        if detections is None:
+            return []
+        boxes = (_clamp_bbox(det[:4], shape) for det in detections)
+        return [bbox for bbox in boxes if bbox is not None]
+
+    if scale < 1.0:
+        small = cv2.resize(ctx.gray, None, fx=scale, fy=scale,
+                           interpolation=cv2.INTER_AREA)
+        min_side = max(1, int(30 * scale))
+        # UMat input runs the cascade on the OpenCL device if present
+        faces = cascade.detectMultiScale(
+            maybe_umat(small),
+            scaleFactor=1.1,
+            minNeighbors=5,
+            minSize=(min_side, min_side)
+        )
+        boxes = (_clamp_bbox([v / scale for v in face], shape)
+                 for face in faces)
+        return [bbox for bbox in boxes if bbox is not None]
+
+    faces = cascade.detectMultiScale(
+        maybe_umat(ctx.gray),
+        scaleFactor=1.1,
+        minNeighbors=5,
+        minSize=(30, 30)
+    )
+    boxes = (_clamp_bbox(face, shape) for face in faces)
+    return [bbox for bbox in boxes if bbox is not None]
+
+
+class FaceTracker:
+    """Throttles a face detector by tracking faces between detections
+
+    Full detection runs every detect_every-th frame; in between, cheap
+    correlation trackers follow the previously detected faces,
+    amortizing the detector cost across the stream. Both detection
+    modules share this logic, each supplying its own detect function.
+    """
+
+    def __init__(self, detect_fn, detect_every: int = 5):
+        """
+        Args:
+            detect_fn: Callable taking a FrameContext and returning face
+                bounding boxes (x, y, w, h)
+            detect_every: Run full detection every this many frames
+        """
+        self.detect_fn = detect_fn
+        self.detect_every = detect_every
+        self.frame_idx = 0
+        self.trackers = []
+
+    @staticmethod
+    def _create_tracker():
+        """Create a lightweight tracker (MOSSE if available, else KCF)"""
+        if hasattr(cv2, 'legacy') and hasattr(cv2.legacy, 'TrackerMOSSE_create'):
+            return cv2.legacy.TrackerMOSSE_create()
+        return cv2.TrackerKCF_create()
+
+    def track_or_detect(self, ctx):
+        """
+        Get face bounding boxes, detecting only every detect_every-th frame
+
+        Args:
+            ctx: FrameContext for the current frame
+
+        Returns:
+            List of face bounding boxes (x, y, w, h)
+        """
+        self.frame_idx += 1
+
+        if self.trackers and self.frame_idx % self.detect_every != 0:
+            faces = []
+            live_trackers = []
+            for tracker in self.trackers:
+                ok, box = tracker.update(ctx.bgr)
+                if not ok:
+                    continue
+                # Tracked boxes drift off-frame; drop trackers whose
+                # clamped box has no area left
+                bbox = _clamp_bbox(box, ctx.bgr.shape)
+                if bbox is None:
+                    continue
+                faces.append(bbox)
+                live_trackers.append(tracker)
+            self.trackers = live_trackers
+            if faces:
+                return faces
+
+        # Detection frame (or all trackers lost): re-seed the trackers.
+        # Clamp before init - seeding a tracker with an out-of-bounds
+        # box raises cv2.error
+        faces = []
+        self.trackers = []
+        for box in self.detect_fn(ctx):
+            bbox = _clamp_bbox(box, ctx.bgr.shape)
+            if bbox is None:
+                continue
+            faces.append(bbox)
+            tracker = self._create_tracker()
+            tracker.init(ctx.bgr, bbox)
+            self.trackers.append(tracker)
+        return faces
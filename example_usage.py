@@ -4,15 +4,19 @@ Demonstrates how to use each module separately
 """
 
 import cv2
-from face_detection import FaceRecognition
-from mood_detection import MoodDetection
-from sleep_detection import SleepDetection
+
+# Decode/analyze every 3rd camera frame (~10 FPS analysis on a 30 FPS source)
+ANALYZE_EVERY_N_FRAMES = 3
+
+# Detection modules are imported lazily inside each example so that
+# running a single mode doesn't pay the import cost of the others
 
 
 def example_face_recognition():
     """Example: Using face recognition only"""
     print("=== Face Recognition Example ===")
-    
+    from face_detection import FaceRecognition
+
     # Initialize face recognition
     face_rec = FaceRecognition(known_faces_dir="known_faces")
     
@@ -23,11 +27,23 @@ def example_face_recognition():
     cap = cv2.VideoCapture(0)
     
     print("Press 'q' to quit")
+    grab_count = 0
     while True:
-        ret, frame = cap.read()
+        # grab() skips the decode for frames we won't analyze;
+        # retrieve() only decodes every ANALYZE_EVERY_N_FRAMES-th frame
+        if not cap.grab():
+            break
+
+        grab_count += 1
+        if grab_count % ANALYZE_EVERY_N_FRAMES != 0:
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+            continue
+
+        ret, frame = cap.retrieve()
         if not ret:
             break
-        
+
         # Process frame
         results = face_rec.process_frame(frame)
         
@@ -61,7 +77,8 @@ def example_face_recognition():
 def example_mood_detection():
     """Example: Using mood detection only"""
     print("=== Mood Detection Example ===")
-    
+    from mood_detection import MoodDetection
+
     # Initialize mood detection
     mood_det = MoodDetection()
     
@@ -69,11 +86,23 @@ def example_mood_detection():
     cap = cv2.VideoCapture(0)
     
     print("Press 'q' to quit")
+    grab_count = 0
     while True:
-        ret, frame = cap.read()
+        # grab() skips the decode for frames we won't analyze;
+        # retrieve() only decodes every ANALYZE_EVERY_N_FRAMES-th frame
+        if not cap.grab():
+            break
+
+        grab_count += 1
+        if grab_count % ANALYZE_EVERY_N_FRAMES != 0:
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+            continue
+
+        ret, frame = cap.retrieve()
         if not ret:
             break
-        
+
         # Process frame
         results = mood_det.process_frame(frame)
         
@@ -114,7 +143,8 @@ def example_mood_detection():
 def example_sleep_detection():
     """Example: Using sleep detection only"""
     print("=== Sleep Detection Example ===")
-    
+    from sleep_detection import SleepDetection
+
     # Initialize sleep detection
     # Optionally provide dlib predictor path for better accuracy
     sleep_det = SleepDetection()  # or SleepDetection(predictor_path="shape_predictor_68_face_landmarks.dat")
@@ -123,11 +153,23 @@ def example_sleep_detection():
     cap = cv2.VideoCapture(0)
     
     print("Press 'q' to quit")
+    grab_count = 0
     while True:
-        ret, frame = cap.read()
+        # grab() skips the decode for frames we won't analyze;
+        # retrieve() only decodes every ANALYZE_EVERY_N_FRAMES-th frame
+        if not cap.grab():
+            break
+
+        grab_count += 1
+        if grab_count % ANALYZE_EVERY_N_FRAMES != 0:
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+            continue
+
+        ret, frame = cap.retrieve()
         if not ret:
             break
-        
+
         # Process frame
         results = sleep_det.process_frame(frame)
         
@@ -0,0 +1,78 @@
+"""
+Frame Context
+Shares per-frame color conversions between detection modules
+"""
+
+import cv2
+import numpy as np
+import threading
+from typing import Tuple
+
+# Per-thread reusable grayscale buffer; a 480p gray frame is ~340 KB,
+# and reusing one per worker thread keeps cvtColor from allocating a
+# fresh one every frame
+_tls = threading.local()
+
+
+class FrameContext:
+    """Caches derived views of a frame so each conversion happens once
+
+    The detection modules each need a grayscale version of the same
+    frame; wrapping the frame in a FrameContext and passing that around
+    means the BGR-to-gray conversion (and per-face gray crops) happen
+    once per frame instead of once per module.
+    """
+
+    def __init__(self, bgr: np.ndarray):
+        """
+        Args:
+            bgr: Input frame (BGR format)
+        """
+        self.bgr = bgr
+        self._gray = None
+        self._gray_faces = {}
+
+    @property
+    def gray(self) -> np.ndarray:
+        """Grayscale view of the frame, converted on first access
+
+        The conversion writes into a thread-local scratch buffer, so a
+        context (and any views into its gray frame) must not outlive
+        the processing of its frame on that thread.
+        """
+        if self._gray is None:
+            shape = self.bgr.shape[:2]
+            scratch = getattr(_tls, 'gray', None)
+            if scratch is None or scratch.shape != shape:
+                scratch = _tls.gray = np.empty(shape, dtype=np.uint8)
+            cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY, dst=scratch)
+            self._gray = scratch
+        return self._gray
+
+    def gray_face(self, face_bbox: Tuple[int, int, int, int]) -> np.ndarray:
+        """
+        Grayscale crop for a face region, cached per bounding box
+
+        Args:
+            face_bbox: Face bounding box (x, y, w, h)
+
+        Returns:
+            Grayscale face crop (view into the cached gray frame)
+        """
+        key = tuple(int(v) for v in face_bbox)
+        crop = self._gray_faces.get(key)
+        if crop is None:
+            x, y, w, h = key
+            # Clamp to the frame: detectors and trackers can emit boxes
+            # poking past the edge, and a negative slice start would
+            # wrap around and yield an empty crop
+            crop = self.gray[max(y, 0):y+h, max(x, 0):x+w]
+            self._gray_faces[key] = crop
+        return crop
+
+
+def ensure_context(frame) -> FrameContext:
+    """Wrap a raw BGR frame in a FrameContext (no-op if already wrapped)"""
+    if isinstance(frame, FrameContext):
+        return frame
+    return FrameContext(frame)
@@ -4,34 +4,80 @@ Integrates face recognition, mood detection, and sleep detection
 """
 
 import cv2
+import dlib
 import numpy as np
 import argparse
+import queue
+import threading
 from typing import Dict, List
 import time
 
 from face_detection import FaceRecognition
+from frame_context import FrameContext
 from mood_detection import MoodDetection
 from sleep_detection import SleepDetection
 
 
+def _put_latest(q: "queue.Queue", item):
+    """Put item on a single-slot queue, dropping any stale entry"""
+    try:
+        q.put_nowait(item)
+    except queue.Full:
+        try:
+            q.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            q.put_nowait(item)
+        except queue.Full:
+            pass
+
+
 class IntegratedDetectionSystem:
     """Integrated system for face recognition, mood, and sleep detection"""
     
-    def __init__(self, known_faces_dir: str = "known_faces", 
+    def __init__(self, known_faces_dir: str = "known_faces",
                  emotion_model_path: str = None,
-                 dlib_predictor_path: str = None):
+                 dlib_predictor_path: str = None,
+                 target_analysis_fps: int = 10,
+                 detection_interval: int = 10):
         """
         Initialize integrated detection system
-        
+
         Args:
             known_faces_dir: Directory with known face images
             emotion_model_path: Path to emotion detection model
             dlib_predictor_path: Path to dlib shape predictor
+            target_analysis_fps: How many frames per second to fully
+                decode and analyze; remaining camera frames are grabbed
+                but not decoded
+            detection_interval: Run full face detection/recognition every
+                N analyzed frames; in between, faces are followed with
+                correlation trackers (~10x cheaper per frame)
         """
         self.face_recognition = FaceRecognition(known_faces_dir)
         self.mood_detection = MoodDetection(emotion_model_path)
         self.sleep_detection = SleepDetection(dlib_predictor_path)
-        
+
+        self.target_analysis_fps = target_analysis_fps
+        self.detection_interval = detection_interval
+
+        # Correlation trackers bridging frames between detection passes;
+        # each entry caches the recognized name since identity is stable
+        self._trackers = []
+        self._analyzed_frame_index = 0
+
+        # Reusable draw buffer so the GUI loop doesn't allocate a
+        # frame-sized array every iteration
+        self._annotated_buf = None
+
+        # Label prefixes are fixed, so measure them once instead of
+        # re-measuring the full line on every face every frame
+        self._label_px = {
+            label: cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0][0]
+            for label in ('Name: ', 'Emotion: ', 'Status: ', 'EAR: ')
+        }
+
         self.fps_counter = 0
         self.fps_start_time = time.time()
         self.current_fps = 0
@@ -58,43 +104,45 @@ class IntegratedDetectionSystem:
         
         cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
         
-        # Prepare text information
+        # Prepare text information as (prefix, value) pairs so only the
+        # variable part needs measuring below
         info_lines = []
-        
+
         # Face recognition
         if results.get('name'):
-            info_lines.append(f"Name: {results['name']}")
-        
+            info_lines.append(('Name: ', results['name']))
+
         # Mood detection
         if results.get('emotion'):
             emotion = results['emotion']
             mood = results.get('mood', 'neutral')
             confidence = results.get('emotion_confidence', 0)
-            info_lines.append(f"Emotion: {emotion} ({mood}) [{confidence:.2f}]")
-        
+            info_lines.append(('Emotion: ', f"{emotion} ({mood}) [{confidence:.2f}]"))
+
         # Sleep detection
         if results.get('drowsiness'):
             drowsiness = results['drowsiness']
             drowsiness_level = drowsiness.get('drowsiness_level', 'awake')
-            info_lines.append(f"Status: {drowsiness_level}")
-            
+            info_lines.append(('Status: ', drowsiness_level))
+
             if drowsiness.get('ear'):
-                info_lines.append(f"EAR: {drowsiness['ear']:.3f}")
-        
+                info_lines.append(('EAR: ', f"{drowsiness['ear']:.3f}"))
+
         # Draw text background
         text_y = y - 10
-        for i, line in enumerate(info_lines):
-            text_size = cv2.getTextSize(line, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0]
+        for i, (prefix, value) in enumerate(info_lines):
+            value_width = cv2.getTextSize(value, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0][0]
+            line_width = self._label_px[prefix] + value_width
             cv2.rectangle(
                 frame,
                 (x, text_y - 15 - i * 20),
-                (x + text_size[0] + 10, text_y - i * 20),
+                (x + line_width + 10, text_y - i * 20),
                 (0, 0, 0),
                 -1
             )
             cv2.putText(
                 frame,
-                line,
+                prefix + value,
                 (x + 5, text_y - 5 - i * 20),
                 cv2.FONT_HERSHEY_SIMPLEX,
                 0.5,
@@ -104,61 +152,106 @@ class IntegratedDetectionSystem:
         
         return frame
     
-    def process_frame(self, frame: np.ndarray) -> np.ndarray:
+    def analyze_frame(self, frame: np.ndarray) -> List[Dict]:
         """
-        Process a single frame with all detection systems
-        
+        Run all detection systems on a frame
+
         Args:
             frame: Input frame (BGR format)
-            
+
         Returns:
-            Annotated frame
+            List of combined per-face result dictionaries
         """
-        # Get face locations from face recognition
-        face_results = self.face_recognition.process_frame(frame)
-        
-        # Process each detected face
-        for face_result in face_results:
+        self._analyzed_frame_index += 1
+
+        if self._trackers and self._analyzed_frame_index % self.detection_interval != 0:
+            # Between detection passes, follow known faces with the
+            # correlation trackers and reuse the cached names. The
+            # tracked position drifts off-frame as the subject moves, so
+            # clamp it and drop trackers whose box has no area left
+            face_results = []
+            live_trackers = []
+            frame_h, frame_w = frame.shape[:2]
+            for entry in self._trackers:
+                entry['tracker'].update(frame)
+                pos = entry['tracker'].get_position()
+                top, left = max(int(pos.top()), 0), max(int(pos.left()), 0)
+                bottom = min(int(pos.bottom()), frame_h)
+                right = min(int(pos.right()), frame_w)
+                if bottom <= top or right <= left:
+                    continue
+                live_trackers.append(entry)
+                face_results.append({
+                    'location': (top, right, bottom, left),
+                    'name': entry['name']
+                })
+            self._trackers = live_trackers
+        else:
+            # Full detection/recognition pass; re-seed the trackers
+            face_results = self.face_recognition.process_frame(frame)
+            self._trackers = []
+            for face_result in face_results:
+                top, right, bottom, left = face_result['location']
+                tracker = dlib.correlation_tracker()
+                tracker.start_track(frame, dlib.rectangle(left, top, right, bottom))
+                self._trackers.append({
+                    'tracker': tracker,
+                    'name': face_result.get('name', 'Unknown')
+                })
+
+        combined_results = []
+
+        # One shared context so mood/sleep reuse the same gray conversion
+        ctx = FrameContext(frame)
+
+        # Process each detected face, reusing the shared bounding boxes
+        # so mood/sleep modules don't re-run their own face detectors
+        for idx, face_result in enumerate(face_results):
             top, right, bottom, left = face_result['location']
             x, y, w, h = left, top, right - left, bottom - top
-            
+            bbox = (x, y, w, h)
+
             # Combine results
             combined_result = {
-                'bbox': (x, y, w, h),
+                'bbox': bbox,
                 'name': face_result.get('name', 'Unknown')
             }
-            
-            # Mood detection
-            mood_results = self.mood_detection.process_frame(frame)
-            for mood_result in mood_results:
-                mx, my, mw, mh = mood_result['bbox']
-                # Check if this mood result corresponds to the same face
-                if abs(mx - x) < w and abs(my - y) < h:
-                    combined_result['emotion'] = mood_result['emotion']
-                    combined_result['mood'] = mood_result['mood']
-                    combined_result['emotion_confidence'] = mood_result['confidence']
-                    break
-            
-            # Sleep detection
-            sleep_results = self.sleep_detection.process_frame(frame)
-            for sleep_result in sleep_results:
-                sx, sy, sw, sh = sleep_result['bbox']
-                # Check if this sleep result corresponds to the same face
-                if abs(sx - x) < w and abs(sy - y) < h:
-                    combined_result['drowsiness'] = sleep_result['drowsiness']
-                    combined_result['head_position'] = sleep_result['head_position']
-                    break
-            
-            # Draw results
+
+            # Mood detection on the known face region
+            mood_result = self.mood_detection.analyze_face(ctx, bbox)
+            combined_result['emotion'] = mood_result['emotion']
+            combined_result['mood'] = mood_result['mood']
+            combined_result['emotion_confidence'] = mood_result['confidence']
+
+            # Sleep detection on the known face region
+            sleep_result = self.sleep_detection.analyze_face(ctx, bbox, f"face_{idx}")
+            combined_result['drowsiness'] = sleep_result['drowsiness']
+            combined_result['head_position'] = sleep_result['head_position']
+
+            combined_results.append(combined_result)
+
+        return combined_results
+
+    def process_frame(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Process a single frame with all detection systems
+
+        Args:
+            frame: Input frame (BGR format)
+
+        Returns:
+            Annotated frame
+        """
+        for combined_result in self.analyze_frame(frame):
             frame = self.draw_results(frame, combined_result)
-        
+
         # Calculate and display FPS
         self.fps_counter += 1
         if time.time() - self.fps_start_time >= 1.0:
             self.current_fps = self.fps_counter
             self.fps_counter = 0
             self.fps_start_time = time.time()
-        
+
         cv2.putText(
             frame,
             f"FPS: {self.current_fps}",
@@ -168,9 +261,42 @@ class IntegratedDetectionSystem:
             (0, 255, 0),
             2
         )
-        
+
         return frame
     
+    def _capture_worker(self, cap, frame_q: "queue.Queue",
+                        stop_event: threading.Event, grab_interval: int):
+        """Grab camera frames, decoding only every grab_interval-th one"""
+        grab_count = 0
+        while not stop_event.is_set():
+            if not cap.grab():
+                stop_event.set()
+                break
+
+            grab_count += 1
+            if grab_count % grab_interval != 0:
+                continue
+
+            ret, frame = cap.retrieve()
+            if not ret:
+                stop_event.set()
+                break
+
+            self._latest_frame = frame
+            _put_latest(frame_q, frame)
+
+    def _inference_worker(self, frame_q: "queue.Queue", results_q: "queue.Queue",
+                          stop_event: threading.Event):
+        """Run the heavy detection pipeline on the freshest available frame"""
+        while not stop_event.is_set():
+            try:
+                frame = frame_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            results = self.analyze_frame(frame)
+            _put_latest(results_q, results)
+
     def run(self, camera_index: int = 0, output_file: str = None):
         """
         Run the integrated detection system
@@ -197,25 +323,94 @@ class IntegratedDetectionSystem:
             frame_size = (640, 480)
             writer = cv2.VideoWriter(output_file, fourcc, fps, frame_size)
         
+        # Only decode/analyze every K-th frame: grab() consumes a frame
+        # without the expensive decode, retrieve() decodes on demand
+        camera_fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        if camera_fps <= 0:
+            camera_fps = 30.0
+        grab_interval = max(1, round(camera_fps / self.target_analysis_fps))
+
         print("Starting detection system...")
         print("Press 'q' to quit, 's' to save screenshot")
-        
+
+        # Producer/consumer pipeline: capture and inference run on their
+        # own threads with single-slot queues (stale frames/results are
+        # dropped), so the GUI loop never blocks on the heavy pipeline
+        self._latest_frame = None
+        frame_q = queue.Queue(maxsize=1)
+        results_q = queue.Queue(maxsize=1)
+        stop_event = threading.Event()
+
+        capture_thread = threading.Thread(
+            target=self._capture_worker,
+            args=(cap, frame_q, stop_event, grab_interval),
+            daemon=True
+        )
+        inference_thread = threading.Thread(
+            target=self._inference_worker,
+            args=(frame_q, results_q, stop_event),
+            daemon=True
+        )
+        capture_thread.start()
+        inference_thread.start()
+
+        last_results = []
+
+        # With OpenCL available, draw on a UMat so OpenCV offloads the
+        # overlay ops (rectangle/putText) and display to the iGPU,
+        # leaving the CPU free for dlib/CNN inference
+        use_opencl = cv2.ocl.haveOpenCL()
+
         try:
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                # Process frame
-                annotated_frame = self.process_frame(frame)
-                
+            while not stop_event.is_set():
+                frame = self._latest_frame
+                if frame is None:
+                    # Camera hasn't delivered a frame yet
+                    if cv2.waitKey(15) & 0xFF == ord('q'):
+                        break
+                    continue
+
+                # Pick up fresh inference results if available,
+                # otherwise redraw the previous ones
+                try:
+                    last_results = results_q.get_nowait()
+                except queue.Empty:
+                    pass
+
+                if use_opencl:
+                    annotated_frame = cv2.UMat(frame)
+                else:
+                    if self._annotated_buf is None or self._annotated_buf.shape != frame.shape:
+                        self._annotated_buf = np.empty_like(frame)
+                    np.copyto(self._annotated_buf, frame)
+                    annotated_frame = self._annotated_buf
+                for combined_result in last_results:
+                    annotated_frame = self.draw_results(annotated_frame, combined_result)
+
+                # Calculate and display FPS
+                self.fps_counter += 1
+                if time.time() - self.fps_start_time >= 1.0:
+                    self.current_fps = self.fps_counter
+                    self.fps_counter = 0
+                    self.fps_start_time = time.time()
+
+                cv2.putText(
+                    annotated_frame,
+                    f"FPS: {self.current_fps}",
+                    (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    1,
+                    (0, 255, 0),
+                    2
+                )
+
                 # Write to output file if specified
                 if writer:
                     writer.write(annotated_frame)
-                
+
                 # Display frame
                 cv2.imshow('Face Recognition, Mood & Sleep Detection', annotated_frame)
-                
+
                 # Handle keyboard input
                 key = cv2.waitKey(1) & 0xFF
                 if key == ord('q'):
@@ -224,11 +419,14 @@ class IntegratedDetectionSystem:
                     screenshot_path = f"screenshot_{int(time.time())}.jpg"
                     cv2.imwrite(screenshot_path, annotated_frame)
                     print(f"Screenshot saved: {screenshot_path}")
-        
+
         except KeyboardInterrupt:
             print("\nStopping detection system...")
-        
+
         finally:
+            stop_event.set()
+            capture_thread.join(timeout=1.0)
+            inference_thread.join(timeout=1.0)
             cap.release()
             if writer:
                 writer.release()
@@ -5,39 +5,251 @@ Detects emotions and mood from facial expressions using deep learning
 
 import cv2
 import numpy as np
-from typing import List, Dict, Tuple
+from collections.abc import Mapping
+from typing import List, Dict, Tuple, Union
 import os
 
+from detectors_common import (FaceTracker, detect_faces, dnn_backend_target,
+                              get_cascade)
+from frame_context import ensure_context
+
+# Emotion -> mood category lookup, hoisted to module level so
+# categorization is one hashed probe instead of rebuilding two lists
+# and scanning them per face per frame
+_MOOD_MAP = {
+    'happy': 'positive',
+    'surprise': 'positive',
+    'angry': 'negative',
+    'disgust': 'negative',
+    'fear': 'negative',
+    'sad': 'negative',
+    'neutral': 'neutral',
+}
+
+# Emotion labels and their positions in a scores array
+_EMOTIONS = ['angry', 'disgust', 'fear', 'happy', 'neutral', 'sad', 'surprise']
+_EMOTION_INDEX = {emotion: i for i, emotion in enumerate(_EMOTIONS)}
+
+
+class ScoresView(Mapping):
+    """Read-only dict-like view over a (len(EMOTIONS),) scores array
+
+    Emotion scores flow through the pipeline as float32 arrays; this
+    wrapper keeps dict-style access (scores['happy'], dict(scores))
+    working for consumers without building a 7-key Python dict per
+    face per frame unless one is actually asked for.
+    """
+
+    __slots__ = ('array',)
+
+    def __init__(self, array: np.ndarray):
+        self.array = array
+
+    def __getitem__(self, emotion: str) -> float:
+        return float(self.array[_EMOTION_INDEX[emotion]])
+
+    def __iter__(self):
+        return iter(_EMOTIONS)
+
+    def __len__(self) -> int:
+        return len(_EMOTIONS)
+
+
+# CUDA preprocessing is optional: used when numba and a CUDA-capable
+# device are present, otherwise the OpenCV CPU path is used
+try:
+    from numba import cuda as _numba_cuda
+    _HAVE_CUDA = _numba_cuda.is_available()
+except Exception:
+    _numba_cuda = None
+    _HAVE_CUDA = False
+
+
+if _HAVE_CUDA:
+    @_numba_cuda.jit
+    def _gpu_preprocess(frame, bboxes, out):
+        """Fused BGR->gray + bilinear 48x48 resize + [0,1] normalize
+
+        Grid is (face, row) blocks of 48 column threads, so every
+        output pixel of every face ROI is computed in one launch.
+        """
+        face_idx = _numba_cuda.blockIdx.x
+        ty = _numba_cuda.blockIdx.y
+        tx = _numba_cuda.threadIdx.x
+
+        x = bboxes[face_idx, 0]
+        y = bboxes[face_idx, 1]
+        w = bboxes[face_idx, 2]
+        h = bboxes[face_idx, 3]
+
+        # Bilinear source coordinates inside the bbox
+        sx = x + (tx + 0.5) * w / 48.0 - 0.5
+        sy = y + (ty + 0.5) * h / 48.0 - 0.5
+
+        x0 = int(sx)
+        y0 = int(sy)
+        if x0 < 0:
+            x0 = 0
+        if y0 < 0:
+            y0 = 0
+        if x0 > frame.shape[1] - 1:
+            x0 = frame.shape[1] - 1
+        if y0 > frame.shape[0] - 1:
+            y0 = frame.shape[0] - 1
+        x1 = min(x0 + 1, frame.shape[1] - 1)
+        y1 = min(y0 + 1, frame.shape[0] - 1)
+        fx = sx - x0
+        fy = sy - y0
+        if fx < 0.0:
+            fx = 0.0
+        if fy < 0.0:
+            fy = 0.0
+
+        # BGR -> gray per corner, then bilinear blend
+        g00 = 0.114 * frame[y0, x0, 0] + 0.587 * frame[y0, x0, 1] + 0.299 * frame[y0, x0, 2]
+        g01 = 0.114 * frame[y0, x1, 0] + 0.587 * frame[y0, x1, 1] + 0.299 * frame[y0, x1, 2]
+        g10 = 0.114 * frame[y1, x0, 0] + 0.587 * frame[y1, x0, 1] + 0.299 * frame[y1, x0, 2]
+        g11 = 0.114 * frame[y1, x1, 0] + 0.587 * frame[y1, x1, 1] + 0.299 * frame[y1, x1, 2]
+        top = g00 + (g01 - g00) * fx
+        bottom = g10 + (g11 - g10) * fx
+        out[face_idx, ty, tx, 0] = (top + (bottom - top) * fy) / 255.0
+
 
 class MoodDetection:
     """Mood and emotion detection from facial expressions"""
     
     # Emotion labels
-    EMOTIONS = ['angry', 'disgust', 'fear', 'happy', 'neutral', 'sad', 'surprise']
-    
-    def __init__(self, model_path: str = None):
+    EMOTIONS = _EMOTIONS
+
+    # YuNet DNN face detector model; used instead of the Haar cascade
+    # when present (several times faster on x86)
+    YUNET_MODEL_FILE = "face_detection_yunet_2023mar.onnx"
+
+    def __init__(self, model_path: str = None, backend: str = 'auto'):
         """
         Initialize mood detection system
-        
+
         Args:
             model_path: Path to emotion detection model (optional)
+            backend: Inference backend ('auto', 'tflite', 'onnx' or
+                'keras'); 'auto' picks by model file extension.
+                Quantized int8 .tflite/.onnx models run 2-4x faster on
+                CPU than FP32 Keras models.
         """
-        self.face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        )
+        self.face_cascade = get_cascade('haarcascade_frontalface_default.xml')
+        self.yunet = None
+        if hasattr(cv2, 'FaceDetectorYN_create') and os.path.exists(self.YUNET_MODEL_FILE):
+            backend_id, target_id = dnn_backend_target()
+            self.yunet = cv2.FaceDetectorYN_create(
+                self.YUNET_MODEL_FILE, "", (320, 240),
+                score_threshold=0.6, nms_threshold=0.3, top_k=50,
+                backend_id=backend_id, target_id=target_id
+            )
+        # Cascade detection runs on a downscaled frame; cost scales with
+        # pixel count, so 0.5 cuts the sliding-window work ~4x
+        self.detect_scale = 0.5
+
+        # Full detection runs every detect_every-th frame; lightweight
+        # trackers follow the faces in between
+        self.face_tracker = FaceTracker(self.detect_face_region)
         self.model_path = model_path
+        self.backend = backend
         self.emotion_model = None
-        
+        self.tflite_interpreter = None
+        self.onnx_session = None
+
         # Initialize emotion detection (using simple rule-based approach)
         # For production, you would load a trained model here
         if model_path and os.path.exists(model_path):
             self.load_model(model_path)
-    
+
     def load_model(self, model_path: str):
-        """Load emotion detection model (placeholder for actual model loading)"""
-        # This is a placeholder - in production, you would load your trained model
-        # Example: self.emotion_model = cv2.dnn.readNetFromTensorflow(model_path)
-        pass
+        """Load emotion detection model, choosing a backend by extension"""
+        backend = self.backend
+        if backend == 'auto':
+            ext = os.path.splitext(model_path)[1].lower()
+            if ext == '.tflite':
+                backend = 'tflite'
+            elif ext == '.onnx':
+                backend = 'onnx'
+            else:
+                backend = 'keras'
+
+        if backend == 'tflite':
+            import tensorflow as tf
+            self.tflite_interpreter = tf.lite.Interpreter(
+                model_path=model_path, num_threads=os.cpu_count()
+            )
+            self.tflite_interpreter.allocate_tensors()
+            self.emotion_model = self.tflite_interpreter
+        elif backend == 'onnx':
+            import onnxruntime
+            sess_options = onnxruntime.SessionOptions()
+            sess_options.intra_op_num_threads = os.cpu_count()
+            self.onnx_session = onnxruntime.InferenceSession(
+                model_path, sess_options, providers=self._onnx_providers()
+            )
+            self.emotion_model = self.onnx_session
+        else:
+            # Placeholder - in production, you would load your trained model
+            # Example: self.emotion_model = cv2.dnn.readNetFromTensorflow(model_path)
+            pass
+
+        self.backend = backend
+
+    @staticmethod
+    def _onnx_providers() -> List[str]:
+        """
+        Pick ONNX Runtime execution providers, preferring GPU backends
+
+        TensorRT (FP16/INT8 engines) and CUDA give a large speedup over
+        CPU for the emotion CNN when the matching onnxruntime build and
+        drivers are installed. On CPU-only hosts OpenVINO comes next:
+        it maps int8 convolutions (see quantize_emotion_model.py) to
+        AVX-512 VNNI, roughly doubling throughput over the default CPU
+        provider. Plain CPU is the final fallback.
+
+        Returns:
+            Provider names in priority order, filtered to what is
+            available in the installed onnxruntime build
+        """
+        import onnxruntime
+        available = set(onnxruntime.get_available_providers())
+        preferred = [
+            'TensorrtExecutionProvider',
+            'CUDAExecutionProvider',
+            'OpenVINOExecutionProvider',
+            'CPUExecutionProvider',
+        ]
+        return [p for p in preferred if p in available]
+
+    def _forward(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Run one forward pass on a (N, 48, 48, 1) float32 batch
+
+        Args:
+            batch: Normalized batch of grayscale face crops
+
+        Returns:
+            (N, len(EMOTIONS)) probability array, or None if no
+            model backend is loaded
+        """
+        if self.tflite_interpreter is not None:
+            interpreter = self.tflite_interpreter
+            input_detail = interpreter.get_input_details()[0]
+            if tuple(input_detail['shape']) != batch.shape:
+                interpreter.resize_tensor_input(input_detail['index'], batch.shape)
+                interpreter.allocate_tensors()
+            interpreter.set_tensor(input_detail['index'], batch)
+            interpreter.invoke()
+            output_detail = interpreter.get_output_details()[0]
+            return interpreter.get_tensor(output_detail['index'])
+
+        if self.onnx_session is not None:
+            input_name = self.onnx_session.get_inputs()[0].name
+            return self.onnx_session.run(None, {input_name: batch})[0]
+
+        return None
     
     def detect_face_region(self, frame: np.ndarray) -> List[Tuple[int, int, int, int]]:
         """
@@ -49,15 +261,10 @@ class MoodDetection:
         Returns:
             List of face bounding boxes (x, y, w, h)
         """
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
-        return faces
-    
+        ctx = ensure_context(frame)
+        return detect_faces(ctx, self.yunet, self.face_cascade,
+                            self.detect_scale)
+
     def extract_facial_features(self, frame: np.ndarray, face_bbox: Tuple[int, int, int, int]) -> np.ndarray:
         """
         Extract facial features from face region
@@ -69,81 +276,100 @@ class MoodDetection:
         Returns:
             Extracted features
         """
-        x, y, w, h = face_bbox
-        face_roi = frame[y:y+h, x:x+w]
-        
-        # Resize to standard size for feature extraction
-        face_resized = cv2.resize(face_roi, (48, 48))
-        gray_face = cv2.cvtColor(face_resized, cv2.COLOR_BGR2GRAY)
-        
-        return gray_face
+        ctx = ensure_context(frame)
+
+        # Resize the cached grayscale crop to the standard size
+        return cv2.resize(ctx.gray_face(face_bbox), (48, 48))
     
-    def predict_emotion_simple(self, face_features: np.ndarray) -> Dict[str, float]:
+    def predict_emotion_simple(self, face_features: np.ndarray) -> np.ndarray:
         """
         Simple emotion prediction based on facial features
         This is a placeholder - replace with actual ML model
-        
+
         Args:
             face_features: Extracted facial features
-            
+
         Returns:
-            Dictionary with emotion probabilities
+            (len(EMOTIONS),) float32 scores array
         """
         # Placeholder: In production, use a trained model
         # For now, return neutral as default
-        emotions = {emotion: 0.0 for emotion in self.EMOTIONS}
-        emotions['neutral'] = 1.0
-        return emotions
-    
-    def predict_emotion(self, frame: np.ndarray, face_bbox: Tuple[int, int, int, int]) -> Dict[str, float]:
+        scores = np.zeros(len(_EMOTIONS), dtype=np.float32)
+        scores[_EMOTION_INDEX['neutral']] = 1.0
+        return scores
+
+    def predict_emotion(self, frame: np.ndarray, face_bbox: Tuple[int, int, int, int]) -> np.ndarray:
         """
         Predict emotion from face region
-        
+
         Args:
             frame: Input frame
             face_bbox: Face bounding box (x, y, w, h)
-            
+
         Returns:
-            Dictionary with emotion probabilities
+            (len(EMOTIONS),) float32 scores array
         """
         face_features = self.extract_facial_features(frame, face_bbox)
-        
+
         if self.emotion_model:
             # Use loaded model for prediction
             return self.predict_emotion_with_model(face_features)
         else:
             # Use simple prediction
             return self.predict_emotion_simple(face_features)
-    
-    def predict_emotion_with_model(self, face_features: np.ndarray) -> Dict[str, float]:
+
+    def predict_emotion_with_model(self, face_features: np.ndarray) -> np.ndarray:
         """
         Predict emotion using loaded model
-        
+
         Args:
             face_features: Extracted facial features
-            
+
         Returns:
-            Dictionary with emotion probabilities
-        """
-        # Placeholder for actual model prediction
-        # Example:
-        # blob = cv2.dnn.blobFromImage(face_features, 1.0, (48, 48))
-        # self.emotion_model.setInput(blob)
-        # predictions = self.emotion_model.forward()
-        # return dict(zip(self.EMOTIONS, predictions[0]))
-        
+            (len(EMOTIONS),) float32 scores array
+        """
+        batch = face_features[np.newaxis, ..., np.newaxis].astype(np.float32) / 255.0
+        predictions = self._forward(batch)
+
+        if predictions is not None:
+            predictions = self._normalize_scores(predictions)
+            return np.asarray(predictions[0], dtype=np.float32)
+
         return self.predict_emotion_simple(face_features)
+
+    @staticmethod
+    def _normalize_scores(predictions: np.ndarray) -> np.ndarray:
+        """
+        Softmax raw model outputs unless they already look like probabilities
+
+        Args:
+            predictions: (N, len(EMOTIONS)) raw model output
+
+        Returns:
+            (N, len(EMOTIONS)) probability array
+        """
+        if np.allclose(predictions.sum(axis=1), 1.0, atol=1e-3):
+            return predictions
+
+        shifted = predictions - predictions.max(axis=1, keepdims=True)
+        exp = np.exp(shifted)
+        return exp / exp.sum(axis=1, keepdims=True)
     
-    def get_dominant_emotion(self, emotion_scores: Dict[str, float]) -> str:
+    def get_dominant_emotion(self, emotion_scores: Union[np.ndarray, Dict[str, float]]) -> str:
         """
         Get the dominant emotion from scores
-        
+
         Args:
-            emotion_scores: Dictionary of emotion probabilities
-            
+            emotion_scores: Scores array (or legacy dict) of emotion
+                probabilities
+
         Returns:
             Name of dominant emotion
         """
+        if isinstance(emotion_scores, ScoresView):
+            emotion_scores = emotion_scores.array
+        if isinstance(emotion_scores, np.ndarray):
+            return _EMOTIONS[int(emotion_scores.argmax())]
         return max(emotion_scores, key=emotion_scores.get)
     
     def get_mood_category(self, emotion: str) -> str:
@@ -156,42 +382,158 @@ class MoodDetection:
         Returns:
             Mood category (positive, negative, neutral)
         """
-        positive_emotions = ['happy', 'surprise']
-        negative_emotions = ['angry', 'disgust', 'fear', 'sad']
-        
-        if emotion in positive_emotions:
-            return 'positive'
-        elif emotion in negative_emotions:
-            return 'negative'
-        else:
-            return 'neutral'
+        return _MOOD_MAP.get(emotion, 'neutral')
     
-    def process_frame(self, frame: np.ndarray) -> List[Dict]:
+    def infer_batch(self, face_crops: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Predict emotions for several face crops in one model call
+
+        Stacking the crops into a single (N, 48, 48, 1) batch lets a
+        loaded model run one forward pass instead of N.
+
+        Args:
+            face_crops: List of face regions (BGR format)
+
+        Returns:
+            List of (len(EMOTIONS),) float32 scores arrays, one per crop
+        """
+        if not face_crops:
+            return []
+
+        # Fill one preallocated batch array instead of stacking N temporaries
+        crops = np.empty((len(face_crops), 48, 48), dtype=np.uint8)
+        for i, crop in enumerate(face_crops):
+            if crop.ndim == 2:
+                cv2.resize(crop, (48, 48), dst=crops[i])
+            else:
+                cv2.cvtColor(cv2.resize(crop, (48, 48)), cv2.COLOR_BGR2GRAY, dst=crops[i])
+
+        batch = crops[..., np.newaxis].astype(np.float32) / 255.0
+        predictions = self._forward(batch)
+        if predictions is not None:
+            predictions = np.asarray(self._normalize_scores(predictions), dtype=np.float32)
+            return list(predictions)
+
+        return [self.predict_emotion_simple(features) for features in crops]
+
+    def _preprocess_batch_gpu(self, frame: np.ndarray,
+                              faces: List[Tuple[int, int, int, int]]) -> np.ndarray:
+        """
+        Preprocess all face ROIs on the GPU in one kernel launch
+
+        Uploads the frame once and runs the fused gray/resize/normalize
+        kernel across every bbox, replacing N separate OpenCV calls.
+
+        Args:
+            frame: Input frame (BGR format)
+            faces: Face bounding boxes (x, y, w, h)
+
+        Returns:
+            (N, 48, 48, 1) float32 normalized batch
+        """
+        bboxes = np.asarray(faces, dtype=np.int32).reshape(-1, 4)
+        d_frame = _numba_cuda.to_device(frame)
+        d_bboxes = _numba_cuda.to_device(bboxes)
+        d_out = _numba_cuda.device_array((len(bboxes), 48, 48, 1), dtype=np.float32)
+        _gpu_preprocess[(len(bboxes), 48), 48](d_frame, d_bboxes, d_out)
+        return d_out.copy_to_host()
+
+    def infer_faces(self, ctx, faces: List[Tuple[int, int, int, int]]) -> List[np.ndarray]:
+        """
+        Predict emotions for all faces in a frame with batched preprocessing
+
+        Uses the CUDA preprocessing kernel when available, otherwise
+        the shared grayscale crops from the frame context.
+
+        Args:
+            ctx: FrameContext for the current frame
+            faces: Face bounding boxes (x, y, w, h)
+
+        Returns:
+            List of (len(EMOTIONS),) float32 scores arrays, one per face
+        """
+        if not faces:
+            return []
+
+        if _HAVE_CUDA and self.emotion_model is not None:
+            batch = self._preprocess_batch_gpu(ctx.bgr, faces)
+            predictions = self._forward(batch)
+            if predictions is not None:
+                predictions = np.asarray(self._normalize_scores(predictions), dtype=np.float32)
+                return list(predictions)
+
+        return self.infer_batch([ctx.gray_face(bbox) for bbox in faces])
+
+    def _result_from_scores(self, face_bbox: Tuple[int, int, int, int],
+                            emotion_scores: np.ndarray) -> Dict:
+        """Build a per-face result dictionary from a scores array"""
+        dominant_idx = int(emotion_scores.argmax())
+        dominant_emotion = _EMOTIONS[dominant_idx]
+        mood_category = self.get_mood_category(dominant_emotion)
+
+        return {
+            'bbox': face_bbox,
+            'emotion': dominant_emotion,
+            'mood': mood_category,
+            # Lazy dict-like view; dict(scores) materializes floats
+            'scores': ScoresView(emotion_scores),
+            'confidence': float(emotion_scores[dominant_idx])
+        }
+
+    def analyze_face(self, frame: np.ndarray, face_bbox: Tuple[int, int, int, int]) -> Dict:
+        """
+        Analyze emotion for a single face at a known location
+
+        Use this when face detection has already been run elsewhere,
+        to avoid re-detecting faces on the full frame.
+
+        Args:
+            frame: Input frame (BGR format)
+            face_bbox: Face bounding box (x, y, w, h)
+
+        Returns:
+            Dictionary with emotion information
+        """
+        emotion_scores = self.predict_emotion(frame, face_bbox)
+        return self._result_from_scores(face_bbox, emotion_scores)
+
+    def process_frame(self, frame: np.ndarray,
+                      faces: List[Tuple[int, int, int, int]] = None) -> List[Dict]:
         """
         Process frame to detect emotions
-        
+
         Args:
             frame: Input frame (BGR format)
-            
+            faces: Optional pre-computed face bounding boxes (x, y, w, h);
+                when supplied the internal face detector is skipped
+
         Returns:
             List of dictionaries with emotion information
         """
-        faces = self.detect_face_region(frame)
+        ctx = ensure_context(frame)
+        if faces is None:
+            faces = self.face_tracker.track_or_detect(ctx)
+
+        if not faces:
+            return []
+
+        if len(faces) == 1:
+            # Fast path for the dominant webcam case: skip the batch
+            # machinery. The result dict is freshly built - reusing one
+            # per-instance dict here corrupted earlier batches' results
+            # when the server batched frames across sessions
+            bbox = tuple(int(v) for v in faces[0])
+            scores = self.predict_emotion(ctx, bbox)
+            return [self._result_from_scores(bbox, scores)]
+
+        # Batch all face crops into a single inference call, reusing the
+        # shared grayscale conversion (or the CUDA kernel) for preprocessing
+        all_scores = self.infer_faces(ctx, faces)
+
         results = []
-        
-        for (x, y, w, h) in faces:
-            emotion_scores = self.predict_emotion(frame, (x, y, w, h))
-            dominant_emotion = self.get_dominant_emotion(emotion_scores)
-            mood_category = self.get_mood_category(dominant_emotion)
-            
-            results.append({
-                'bbox': (x, y, w, h),
-                'emotion': dominant_emotion,
-                'mood': mood_category,
-                'scores': emotion_scores,
-                'confidence': emotion_scores[dominant_emotion]
-            })
-        
+        for (x, y, w, h), emotion_scores in zip(faces, all_scores):
+            results.append(self._result_from_scores((x, y, w, h), emotion_scores))
+
         return results
 
 
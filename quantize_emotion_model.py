@@ -0,0 +1,86 @@
+"""
+Quantize an FP32 ONNX emotion model to int8 with static quantization
+Int8 models run 1.3-2x faster on AVX2/VNNI CPUs and are ~4x smaller
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    QuantFormat,
+    QuantType,
+    quantize_static,
+)
+
+
+class FaceCropCalibrationDataReader(CalibrationDataReader):
+    """Feeds preprocessed 48x48 gray face crops for calibration"""
+
+    def __init__(self, sample_dir, input_name, limit=200):
+        """
+        Args:
+            sample_dir: Directory of sample face images
+            input_name: Name of the model's input tensor
+            limit: Maximum number of calibration samples
+        """
+        self.input_name = input_name
+        self.samples = []
+
+        for filename in sorted(os.listdir(sample_dir))[:limit]:
+            if not filename.lower().endswith(('.jpg', '.jpeg', '.png')):
+                continue
+            image = cv2.imread(os.path.join(sample_dir, filename), cv2.IMREAD_GRAYSCALE)
+            if image is None:
+                continue
+            face = cv2.resize(image, (48, 48)).astype(np.float32) / 255.0
+            self.samples.append(face[np.newaxis, ..., np.newaxis])
+
+        self._iter = iter(self.samples)
+
+    def get_next(self):
+        batch = next(self._iter, None)
+        if batch is None:
+            return None
+        return {self.input_name: batch}
+
+
+def quantize(fp32_model_path, int8_model_path, sample_dir):
+    """
+    Statically quantize an ONNX emotion model to int8
+
+    Args:
+        fp32_model_path: Path to the FP32 .onnx model
+        int8_model_path: Output path for the quantized model
+        sample_dir: Directory of sample face images for calibration
+    """
+    import onnxruntime
+
+    session = onnxruntime.InferenceSession(
+        fp32_model_path, providers=['CPUExecutionProvider']
+    )
+    input_name = session.get_inputs()[0].name
+
+    reader = FaceCropCalibrationDataReader(sample_dir, input_name)
+
+    quantize_static(
+        model_input=fp32_model_path,
+        model_output=int8_model_path,
+        calibration_data_reader=reader,
+        quant_format=QuantFormat.QDQ,
+        weight_type=QuantType.QInt8,
+        activation_type=QuantType.QInt8,
+    )
+
+    print(f"Saved quantized model to {int8_model_path}")
+    print(f"Size: {os.path.getsize(int8_model_path) / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4:
+        print("Usage: python quantize_emotion_model.py <fp32.onnx> <int8.onnx> <sample_faces_dir>")
+        sys.exit(1)
+
+    quantize(sys.argv[1], sys.argv[2], sys.argv[3])
@@ -5,68 +5,157 @@ Detects drowsiness and sleepiness from facial features (eye closure, head positi
 
 import cv2
 import numpy as np
-from typing import List, Dict, Tuple
-import dlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 import os
 
+# dlib is imported lazily in __init__: its import dlopens BLAS and costs
+# hundreds of ms, and it is only needed when a shape predictor is used
+
+from detectors_common import (FaceTracker, detect_faces, dnn_backend_target,
+                              get_cascade)
+from frame_context import ensure_context
+
 
 class SleepDetection:
     """Sleep and drowsiness detection from facial features"""
     
+    # YuNet DNN face detector model; used instead of the Haar cascade
+    # when present (several times faster on x86)
+    YUNET_MODEL_FILE = "face_detection_yunet_2023mar.onnx"
+
+    # Default predictor files looked up when no path is given; the 5-point
+    # model is >10x smaller and faster to load than the 68-point one
+    DEFAULT_PREDICTOR_FILES = [
+        "shape_predictor_5_face_landmarks.dat",
+        "shape_predictor_68_face_landmarks.dat",
+    ]
+
     def __init__(self, predictor_path: str = None):
         """
         Initialize sleep detection system
-        
+
         Args:
-            predictor_path: Path to dlib shape predictor (optional)
+            predictor_path: Path to dlib shape predictor (optional;
+                defaults to a 5- or 68-point model found in the
+                working directory)
         """
-        self.face_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        )
-        self.eye_cascade = cv2.CascadeClassifier(
-            cv2.data.haarcascades + 'haarcascade_eye.xml'
-        )
-        
+        self.face_cascade = get_cascade('haarcascade_frontalface_default.xml')
+        self.eye_cascade = get_cascade('haarcascade_eye.xml')
+        self.yunet = None
+        if hasattr(cv2, 'FaceDetectorYN_create') and os.path.exists(self.YUNET_MODEL_FILE):
+            backend_id, target_id = dnn_backend_target()
+            self.yunet = cv2.FaceDetectorYN_create(
+                self.YUNET_MODEL_FILE, "", (320, 240),
+                score_threshold=0.6, nms_threshold=0.3, top_k=50,
+                backend_id=backend_id, target_id=target_id
+            )
+
         self.predictor = None
         self.detector = None
-        
+
+        # Cascade detection runs on a downscaled frame; cost scales with
+        # pixel count, so 0.5 cuts the sliding-window work ~4x
+        self.detect_scale = 0.5
+
+        # Full detection runs every detect_every-th frame; lightweight
+        # trackers follow the faces in between (keeping face_id stable,
+        # which also helps drowsiness history continuity)
+        self.face_tracker = FaceTracker(self._detect_faces)
+
+        # Per-face eye/head analysis runs in a persistent thread pool;
+        # the OpenCV and dlib calls release the GIL, so multi-face
+        # frames scale with cores
+        self.pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+
+        # Head-position thresholds, cached per frame shape so the per-face
+        # classification is integer compares only
+        self._head_cache_shape = None
+        self._frame_center = (0, 0)
+        self._tilt_thresh_x = 0
+        self._nod_thresh_y = 0
+        self._inv_center = (0.0, 0.0)
+
         # Eye aspect ratio threshold (below this indicates closed eyes)
         self.EAR_THRESHOLD = 0.25
         self.EAR_CONSECUTIVE_FRAMES = 3
         
-        # Track eye closure frames
+        # Track eye closure frames; history is a fixed-size ring buffer
+        # per face so updates and the closure ratio are O(1)
+        self.HISTORY_FRAMES = 30
         self.eye_closure_counter = {}
-        self.eye_closure_history = {}
-        
-        # Initialize dlib if predictor is provided
+        self.eye_closure_ring = {}
+        self.ring_idx = {}
+        self.ring_sum = {}
+        self.ring_filled = {}
+        # Drop per-face state for faces not seen for this many frames
+        self._face_last_seen = {}
+        self._stale_after_frames = 300
+        
+        # Fall back to a bundled predictor file if none was specified
+        if predictor_path is None:
+            for candidate in self.DEFAULT_PREDICTOR_FILES:
+                if os.path.exists(candidate):
+                    predictor_path = candidate
+                    break
+
+        # Initialize dlib if predictor is available
         if predictor_path and os.path.exists(predictor_path):
+            import dlib
             self.detector = dlib.get_frontal_face_detector()
             self.predictor = dlib.shape_predictor(predictor_path)
     
+    @staticmethod
+    def _ear_batch(eyes) -> np.ndarray:
+        """
+        Calculate Eye Aspect Ratio for several eyes in one vectorized pass
+
+        Args:
+            eyes: Sequence of (6, 2) eye landmark arrays
+
+        Returns:
+            Array of EAR values, one per eye
+        """
+        eyes = np.asarray(eyes, dtype=np.float64).reshape(-1, 6, 2)
+        # Rows: vertical 1-5, vertical 2-4, horizontal 0-3
+        d = eyes[:, [1, 2, 0], :] - eyes[:, [5, 4, 3], :]
+        n = np.sqrt((d * d).sum(-1))
+        return (n[:, 0] + n[:, 1]) / (2.0 * np.maximum(n[:, 2], 1e-6))
+
     def calculate_eye_aspect_ratio(self, eye_points: np.ndarray) -> float:
         """
         Calculate Eye Aspect Ratio (EAR)
-        
+
         Args:
             eye_points: Array of eye landmark points
-            
+
         Returns:
             Eye aspect ratio value
         """
-        # Vertical distances
-        vertical_1 = np.linalg.norm(eye_points[1] - eye_points[5])
-        vertical_2 = np.linalg.norm(eye_points[2] - eye_points[4])
-        
-        # Horizontal distance
-        horizontal = np.linalg.norm(eye_points[0] - eye_points[3])
-        
-        # Calculate EAR
-        if horizontal == 0:
-            return 0.0
-        
-        ear = (vertical_1 + vertical_2) / (2.0 * horizontal)
-        return ear
+        return float(self._ear_batch(eye_points)[0])
     
+    @staticmethod
+    def _shape_to_np(shape) -> np.ndarray:
+        """
+        Convert a dlib full_object_detection to a (num_parts, 2) int array
+
+        Filling a preallocated array in one pass replaces the per-point
+        Python comprehensions; eye regions become plain slices.
+
+        Args:
+            shape: dlib landmark prediction
+
+        Returns:
+            (num_parts, 2) array of (x, y) landmark coordinates
+        """
+        coords = np.empty((shape.num_parts, 2), dtype=np.int32)
+        for i in range(shape.num_parts):
+            p = shape.part(i)
+            coords[i, 0] = p.x
+            coords[i, 1] = p.y
+        return coords
+
     def detect_eyes_opencv(self, frame: np.ndarray, face_bbox: Tuple[int, int, int, int]) -> Dict:
         """
         Detect eyes using OpenCV with improved computer vision techniques
@@ -78,13 +167,12 @@ class SleepDetection:
         Returns:
             Dictionary with eye detection results
         """
+        ctx = ensure_context(frame)
         x, y, w, h = face_bbox
-        
-        # Extract face region
-        roi_gray = cv2.cvtColor(frame[y:y+h, x:x+w], cv2.COLOR_BGR2GRAY)
-        
-        # Improve detection with histogram equalization
-        roi_gray = cv2.equalizeHist(roi_gray)
+
+        # Improve detection with histogram equalization (the cached
+        # grayscale crop is copied here rather than mutated)
+        roi_gray = cv2.equalizeHist(ctx.gray_face(face_bbox))
         
         # Detect eyes in the upper half of the face (more accurate)
         upper_face_roi = roi_gray[0:int(h*0.6), 0:w]
@@ -153,21 +241,29 @@ class SleepDetection:
         Returns:
             Dictionary with eye detection results
         """
+        ctx = ensure_context(frame)
+
         if not self.predictor:
-            return self.detect_eyes_opencv(frame, face_bbox)
-        
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        shape = self.predictor(gray, face_bbox)
-        
+            return self.detect_eyes_opencv(ctx, face_bbox)
+
+        shape = self.predictor(ctx.gray, face_bbox)
+
+        if shape.num_parts < 68:
+            # 5-point model only gives eye corners, which isn't enough
+            # vertical information for EAR; use the OpenCV eye path instead
+            bbox = (face_bbox.left(), face_bbox.top(),
+                    face_bbox.width(), face_bbox.height())
+            return self.detect_eyes_opencv(ctx, bbox)
+
         # Extract eye landmarks (dlib 68-point model)
         # Left eye: points 36-41
         # Right eye: points 42-47
-        left_eye_points = np.array([(shape.part(i).x, shape.part(i).y) for i in range(36, 42)])
-        right_eye_points = np.array([(shape.part(i).x, shape.part(i).y) for i in range(42, 48)])
-        
-        left_ear = self.calculate_eye_aspect_ratio(left_eye_points)
-        right_ear = self.calculate_eye_aspect_ratio(right_eye_points)
+        pts = self._shape_to_np(shape)
+        left_eye_points = pts[36:42]
+        right_eye_points = pts[42:48]
         
+        left_ear, right_ear = self._ear_batch([left_eye_points, right_eye_points])
+
         avg_ear = (left_ear + right_ear) / 2.0
         
         return {
@@ -190,34 +286,40 @@ class SleepDetection:
         Returns:
             Dictionary with head position information
         """
+        ctx = ensure_context(frame)
         x, y, w, h = face_bbox
-        face_center_x = x + w // 2
-        face_center_y = y + h // 2
-        
-        frame_center_x = frame.shape[1] // 2
-        frame_center_y = frame.shape[0] // 2
-        
-        # Calculate head position relative to frame center
-        offset_x = face_center_x - frame_center_x
-        offset_y = face_center_y - frame_center_y
-        
-        # Normalize
-        normalized_x = offset_x / frame_center_x
-        normalized_y = offset_y / frame_center_y
-        
-        # Determine head position
-        head_tilt = "center"
-        if abs(normalized_x) > 0.3:
-            head_tilt = "left" if normalized_x < 0 else "right"
-        
-        head_nod = "center"
-        if abs(normalized_y) > 0.3:
-            head_nod = "up" if normalized_y < 0 else "down"
-        
+
+        height, width = ctx.bgr.shape[:2]
+        if self._head_cache_shape != (height, width):
+            # Recompute the pixel-space thresholds and reciprocal
+            # normalizers only when the frame size changes
+            cx = width >> 1
+            cy = height >> 1
+            self._head_cache_shape = (height, width)
+            self._frame_center = (cx, cy)
+            self._tilt_thresh_x = int(0.3 * cx)
+            self._nod_thresh_y = int(0.3 * cy)
+            self._inv_center = (1.0 / cx, 1.0 / cy)
+
+        # Head position relative to frame center, all in integer pixels
+        cx, cy = self._frame_center
+        offset_x = (x + (w >> 1)) - cx
+        offset_y = (y + (h >> 1)) - cy
+
+        # Integer compares pick the 3x3 category without float math
+        tx = self._tilt_thresh_x
+        ty = self._nod_thresh_y
+        head_tilt = ("left", "center", "right")[1 + (offset_x > tx) - (offset_x < -tx)]
+        head_nod = ("up", "center", "down")[1 + (offset_y > ty) - (offset_y < -ty)]
+
+        # Normalized offset kept for consumers; multiply by the cached
+        # reciprocals instead of dividing per face
+        inv_x, inv_y = self._inv_center
+
         return {
             'tilt': head_tilt,
             'nod': head_nod,
-            'offset': (normalized_x, normalized_y)
+            'offset': (offset_x * inv_x, offset_y * inv_y)
         }
     
     def check_drowsiness(self, face_id: str, eyes_open: bool, ear: float = None) -> Dict:
@@ -234,20 +336,31 @@ class SleepDetection:
         """
         if face_id not in self.eye_closure_counter:
             self.eye_closure_counter[face_id] = 0
-            self.eye_closure_history[face_id] = []
-        
+            self.eye_closure_ring[face_id] = np.zeros(self.HISTORY_FRAMES, dtype=np.uint8)
+            self.ring_idx[face_id] = 0
+            self.ring_sum[face_id] = 0
+            self.ring_filled[face_id] = 0
+
         if not eyes_open:
             self.eye_closure_counter[face_id] += 1
         else:
             self.eye_closure_counter[face_id] = 0
-        
-        # Update history
-        self.eye_closure_history[face_id].append(1 if not eyes_open else 0)
-        if len(self.eye_closure_history[face_id]) > 30:  # Keep last 30 frames
-            self.eye_closure_history[face_id].pop(0)
-        
+
+        # Update history ring buffer and its running sum in O(1)
+        ring = self.eye_closure_ring[face_id]
+        idx = self.ring_idx[face_id]
+        new = 0 if eyes_open else 1
+        self.ring_sum[face_id] += new - ring[idx]
+        ring[idx] = new
+        self.ring_idx[face_id] = (idx + 1) % self.HISTORY_FRAMES
+        if self.ring_filled[face_id] < self.HISTORY_FRAMES:
+            self.ring_filled[face_id] += 1
+
         # Calculate drowsiness metrics
-        closure_ratio = sum(self.eye_closure_history[face_id]) / len(self.eye_closure_history[face_id])
+        closure_ratio = self.ring_sum[face_id] / self.ring_filled[face_id]
+
+        self._face_last_seen[face_id] = self.face_tracker.frame_idx
+        self._drop_stale_faces()
         
         is_drowsy = self.eye_closure_counter[face_id] >= self.EAR_CONSECUTIVE_FRAMES
         is_sleepy = closure_ratio > 0.5  # Eyes closed more than 50% of the time
@@ -266,60 +379,153 @@ class SleepDetection:
             'closure_ratio': closure_ratio,
             'ear': ear
         }
-    
-    def process_frame(self, frame: np.ndarray) -> List[Dict]:
+
+    def _drop_stale_faces(self):
+        """Forget per-face state for faces not seen recently
+
+        Keeps the tracking dicts from growing without bound in long
+        sessions where face ids come and go.
+        """
+        cutoff = self.face_tracker.frame_idx - self._stale_after_frames
+        if cutoff <= 0:
+            return
+        stale = [fid for fid, last in self._face_last_seen.items() if last < cutoff]
+        for fid in stale:
+            del self._face_last_seen[fid]
+            self.eye_closure_counter.pop(fid, None)
+            self.eye_closure_ring.pop(fid, None)
+            self.ring_idx.pop(fid, None)
+            self.ring_sum.pop(fid, None)
+            self.ring_filled.pop(fid, None)
+
+
+    def analyze_face(self, frame: np.ndarray, face_bbox: Tuple[int, int, int, int],
+                     face_id: str = "face_0") -> Dict:
+        """
+        Analyze sleep/drowsiness for a single face at a known location
+
+        Use this when face detection has already been run elsewhere,
+        to avoid re-detecting faces on the full frame.
+
+        Args:
+            frame: Input frame (BGR format)
+            face_bbox: Face bounding box (x, y, w, h)
+            face_id: Unique identifier for drowsiness tracking
+
+        Returns:
+            Dictionary with sleep detection information
+        """
+        ctx = ensure_context(frame)
+        eye_data, ear, head_position = self._face_observations(ctx, face_bbox)
+
+        # Check drowsiness
+        drowsiness = self.check_drowsiness(
+            face_id,
+            eye_data.get('eyes_open', False),
+            ear
+        )
+
+        return {
+            'bbox': tuple(face_bbox),
+            'face_id': face_id,
+            'eyes_open': eye_data.get('eyes_open', False),
+            'head_position': head_position,
+            'drowsiness': drowsiness,
+            'eye_data': eye_data
+        }
+
+    def _face_observations(self, ctx, face_bbox: Tuple[int, int, int, int]) -> Tuple[Dict, float, Dict]:
+        """
+        Run the stateless per-face analysis (eyes and head position)
+
+        Safe to call from worker threads: it only reads frame data and
+        leaves the shared drowsiness state untouched.
+
+        Args:
+            ctx: FrameContext for the current frame
+            face_bbox: Face bounding box (x, y, w, h)
+
+        Returns:
+            Tuple of (eye_data, ear, head_position)
+        """
+        x, y, w, h = face_bbox
+
+        # Detect eyes
+        if self.predictor:
+            # Use dlib for more accurate detection (already imported by
+            # __init__ when a predictor was loaded; this is a dict hit)
+            import dlib
+            dlib_rect = dlib.rectangle(x, y, x+w, y+h)
+            eye_data = self.detect_eyes_dlib(ctx, dlib_rect)
+            ear = eye_data.get('avg_ear', 0.0)
+        else:
+            # Use OpenCV
+            eye_data = self.detect_eyes_opencv(ctx, (x, y, w, h))
+            ear = None
+
+        # Detect head position
+        head_position = self.detect_head_position(ctx, (x, y, w, h))
+
+        return eye_data, ear, head_position
+
+    def _detect_faces(self, ctx) -> List[Tuple[int, int, int, int]]:
+        """
+        Detect face bounding boxes in the frame
+
+        Args:
+            ctx: FrameContext for the current frame
+
+        Returns:
+            List of face bounding boxes (x, y, w, h)
+        """
+        return detect_faces(ctx, self.yunet, self.face_cascade,
+                            self.detect_scale)
+
+    def process_frame(self, frame: np.ndarray,
+                      faces: Optional[List[Tuple[int, int, int, int]]] = None) -> List[Dict]:
         """
         Process frame to detect sleep/drowsiness
-        
+
         Args:
             frame: Input frame (BGR format)
-            
+            faces: Optional pre-computed face bounding boxes (x, y, w, h);
+                   when supplied the internal face detector is skipped
+
         Returns:
             List of dictionaries with sleep detection information
         """
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.1,
-            minNeighbors=5,
-            minSize=(30, 30)
-        )
-        
+        ctx = ensure_context(frame)
+        if faces is None:
+            faces = self.face_tracker.track_or_detect(ctx)
+
+        if len(faces) > 1:
+            # Materialize the shared gray frame once before fanning out,
+            # then run the GIL-releasing per-face work in parallel
+            _ = ctx.gray
+            observations = list(self.pool.map(
+                lambda bbox: self._face_observations(ctx, bbox), faces
+            ))
+        else:
+            observations = [self._face_observations(ctx, bbox) for bbox in faces]
+
         results = []
-        
-        for idx, (x, y, w, h) in enumerate(faces):
-            face_id = f"face_{idx}"
-            
-            # Detect eyes
-            if self.predictor:
-                # Use dlib for more accurate detection
-                dlib_rect = dlib.rectangle(x, y, x+w, y+h)
-                eye_data = self.detect_eyes_dlib(frame, dlib_rect)
-                ear = eye_data.get('avg_ear', 0.0)
-            else:
-                # Use OpenCV
-                eye_data = self.detect_eyes_opencv(frame, (x, y, w, h))
-                ear = None
-            
-            # Detect head position
-            head_position = self.detect_head_position(frame, (x, y, w, h))
-            
-            # Check drowsiness
+
+        # Drowsiness state mutation stays on the calling thread
+        for idx, (bbox, (eye_data, ear, head_position)) in enumerate(zip(faces, observations)):
             drowsiness = self.check_drowsiness(
-                face_id,
+                f"face_{idx}",
                 eye_data.get('eyes_open', False),
                 ear
             )
-            
             results.append({
-                'bbox': (x, y, w, h),
-                'face_id': face_id,
+                'bbox': tuple(bbox),
+                'face_id': f"face_{idx}",
                 'eyes_open': eye_data.get('eyes_open', False),
                 'head_position': head_position,
                 'drowsiness': drowsiness,
                 'eye_data': eye_data
             })
-        
+
         return results
 
 
@@ -1,188 +1,506 @@
 # -*- coding: utf-8 -*-
 """
 Update HTML file with complete Indian Curriculum for Classes 1-10
+
+The subjectsData blob is generated from compact structure-of-arrays
+tables (chapter titles per subject, one URL pool per pace) instead of a
+hand-written literal, so adding a class or subject is a few lines of
+data rather than hundreds of lines of repeated dicts.
 """
+import json
+import mmap
+import os
 import re
 
-# Read the HTML file
-with open('eduquest.html', 'r', encoding='utf-8') as f:
-    content = f.read()
-
-# Find the start and end of subjectsData
-start_pattern = r"subjectsData: \{"
-end_pattern = r"^\s*\}\s*$"
-
-# Find the position where subjectsData starts
-start_match = re.search(start_pattern, content)
-if not start_match:
-    print("Could not find subjectsData")
-    exit(1)
-
-# Find where subjectsData ends (look for the closing brace after all class data)
-# We'll replace from the start of subjectsData to just before the closing brace
-subjects_start = start_match.start()
-
-# Find the closing brace of subjectsData (it should be after all class definitions)
-# Look for the pattern: }\n        };
-pattern = r"(\s*)\}\s*\}\s*;\s*// Motivational quotes"
-end_match = re.search(pattern, content[subjects_start:], re.MULTILINE)
-if not end_match:
-    print("Could not find end of subjectsData")
-    exit(1)
-
-subjects_end = subjects_start + end_match.start()
-
-# Generate the new subjectsData structure
-new_subjects_data = """            subjectsData: {
-                '1': {
-                    subjects: [
-                        {
-                            name: 'Hindi',
-                            icon: '🇮🇳',
-                            chapters: {
-                                slow: [
-                                    { title: 'Chapter 1: वर्णमाला (Alphabet)', url: 'https://www.youtube.com/watch?v=DR-cfDsHCGA' },
-                                    { title: 'Chapter 2: शब्द और वाक्य (Words and Sentences)', url: 'https://www.youtube.com/watch?v=3XPhMXAjplM' },
-                                    { title: 'Chapter 3: कहानियाँ (Stories)', url: 'https://www.youtube.com/watch?v=QxVX-iE2fYI' },
-                                    { title: 'Chapter 4: कविताएँ (Poems)', url: 'https://www.youtube.com/watch?v=OEbRDtCAFdU' },
-                                    { title: 'Chapter 5: लेखन अभ्यास (Writing Practice)', url: 'https://www.youtube.com/watch?v=uYMNf7r7k2c' }
-                                ],
-                                medium: [
-                                    { title: 'Chapter 1: वर्णमाला (Alphabet)', url: 'https://www.youtube.com/watch?v=36IBDpTRVNE' },
-                                    { title: 'Chapter 2: शब्द और वाक्य (Words and Sentences)', url: 'https://www.youtube.com/watch?v=hq3yfQnllfQ' },
-                                    { title: 'Chapter 3: कहानियाँ (Stories)', url: 'https://www.youtube.com/watch?v=zA52fNEnSuk' },
-                                    { title: 'Chapter 4: कविताएँ (Poems)', url: 'https://www.youtube.com/watch?v=3O0m0s0Xh0k' },
-                                    { title: 'Chapter 5: लेखन अभ्यास (Writing Practice)', url: 'https://www.youtube.com/watch?v=8Jpkv_CeyJM' }
-                                ],
-                                fast: [
-                                    { title: 'Chapter 1: वर्णमाला (Alphabet)', url: 'https://www.youtube.com/watch?v=wMFPe-DwULM' },
-                                    { title: 'Chapter 2: शब्द और वाक्य (Words and Sentences)', url: 'https://www.youtube.com/watch?v=zPpqVB3k3-o' },
-                                    { title: 'Chapter 3: कहानियाँ (Stories)', url: 'https://www.youtube.com/watch?v=SUwVmrSh3zY' },
-                                    { title: 'Chapter 4: कविताएँ (Poems)', url: 'https://www.youtube.com/watch?v=3Ja4j4ltnRw' },
-                                    { title: 'Chapter 5: लेखन अभ्यास (Writing Practice)', url: 'https://www.youtube.com/watch?v=9pvL9N1fZoc' }
-                                ]
-                            }
-                        },
-                        {
-                            name: 'English',
-                            icon: '📚',
-                            chapters: {
-                                slow: [
-                                    { title: 'Chapter 1: Alphabet and Sounds', url: 'https://www.youtube.com/watch?v=DR-cfDsHCGA' },
-                                    { title: 'Chapter 2: Simple Words', url: 'https://www.youtube.com/watch?v=3XPhMXAjplM' },
-                                    { title: 'Chapter 3: Reading Stories', url: 'https://www.youtube.com/watch?v=QxVX-iE2fYI' },
-                                    { title: 'Chapter 4: Writing Practice', url: 'https://www.youtube.com/watch?v=OEbRDtCAFdU' },
-                                    { title: 'Chapter 5: Grammar Basics', url: 'https://www.youtube.com/watch?v=uYMNf7r7k2c' }
-                                ],
-                                medium: [
-                                    { title: 'Chapter 1: Alphabet and Sounds', url: 'https://www.youtube.com/watch?v=36IBDpTRVNE' },
-                                    { title: 'Chapter 2: Simple Words', url: 'https://www.youtube.com/watch?v=hq3yfQnllfQ' },
-                                    { title: 'Chapter 3: Reading Stories', url: 'https://www.youtube.com/watch?v=zA52fNEnSuk' },
-                                    { title: 'Chapter 4: Writing Practice', url: 'https://www.youtube.com/watch?v=3O0m0s0Xh0k' },
-                                    { title: 'Chapter 5: Grammar Basics', url: 'https://www.youtube.com/watch?v=8Jpkv_CeyJM' }
-                                ],
-                                fast: [
-                                    { title: 'Chapter 1: Alphabet and Sounds', url: 'https://www.youtube.com/watch?v=wMFPe-DwULM' },
-                                    { title: 'Chapter 2: Simple Words', url: 'https://www.youtube.com/watch?v=zPpqVB3k3-o' },
-                                    { title: 'Chapter 3: Reading Stories', url: 'https://www.youtube.com/watch?v=SUwVmrSh3zY' },
-                                    { title: 'Chapter 4: Writing Practice', url: 'https://www.youtube.com/watch?v=3Ja4j4ltnRw' },
-                                    { title: 'Chapter 5: Grammar Basics', url: 'https://www.youtube.com/watch?v=9pvL9N1fZoc' }
-                                ]
-                            }
-                        },
-                        {
-                            name: 'Mathematics',
-                            icon: '🔢',
-                            chapters: {
-                                slow: [
-                                    { title: 'Chapter 1: Numbers 1-20', url: 'https://www.youtube.com/watch?v=DR-cfDsHCGA' },
-                                    { title: 'Chapter 2: Addition', url: 'https://www.youtube.com/watch?v=3XPhMXAjplM' },
-                                    { title: 'Chapter 3: Subtraction', url: 'https://www.youtube.com/watch?v=QxVX-iE2fYI' },
-                                    { title: 'Chapter 4: Shapes', url: 'https://www.youtube.com/watch?v=OEbRDtCAFdU' },
-                                    { title: 'Chapter 5: Measurement', url: 'https://www.youtube.com/watch?v=uYMNf7r7k2c' }
-                                ],
-                                medium: [
-                                    { title: 'Chapter 1: Numbers 1-20', url: 'https://www.youtube.com/watch?v=36IBDpTRVNE' },
-                                    { title: 'Chapter 2: Addition', url: 'https://www.youtube.com/watch?v=hq3yfQnllfQ' },
-                                    { title: 'Chapter 3: Subtraction', url: 'https://www.youtube.com/watch?v=zA52fNEnSuk' },
-                                    { title: 'Chapter 4: Shapes', url: 'https://www.youtube.com/watch?v=3O0m0s0Xh0k' },
-                                    { title: 'Chapter 5: Measurement', url: 'https://www.youtube.com/watch?v=8Jpkv_CeyJM' }
-                                ],
-                                fast: [
-                                    { title: 'Chapter 1: Numbers 1-20', url: 'https://www.youtube.com/watch?v=wMFPe-DwULM' },
-                                    { title: 'Chapter 2: Addition', url: 'https://www.youtube.com/watch?v=zPpqVB3k3-o' },
-                                    { title: 'Chapter 3: Subtraction', url: 'https://www.youtube.com/watch?v=SUwVmrSh3zY' },
-                                    { title: 'Chapter 4: Shapes', url: 'https://www.youtube.com/watch?v=3Ja4j4ltnRw' },
-                                    { title: 'Chapter 5: Measurement', url: 'https://www.youtube.com/watch?v=9pvL9N1fZoc' }
-                                ]
-                            }
-                        },
-                        {
-                            name: 'Environmental Studies',
-                            icon: '🌿',
-                            chapters: {
-                                slow: [
-                                    { title: 'Chapter 1: My Family', url: 'https://www.youtube.com/watch?v=DR-cfDsHCGA' },
-                                    { title: 'Chapter 2: My School', url: 'https://www.youtube.com/watch?v=3XPhMXAjplM' },
-                                    { title: 'Chapter 3: Plants and Animals', url: 'https://www.youtube.com/watch?v=QxVX-iE2fYI' },
-                                    { title: 'Chapter 4: Food We Eat', url: 'https://www.youtube.com/watch?v=OEbRDtCAFdU' },
-                                    { title: 'Chapter 5: Water and Air', url: 'https://www.youtube.com/watch?v=uYMNf7r7k2c' }
-                                ],
-                                medium: [
-                                    { title: 'Chapter 1: My Family', url: 'https://www.youtube.com/watch?v=36IBDpTRVNE' },
-                                    { title: 'Chapter 2: My School', url: 'https://www.youtube.com/watch?v=hq3yfQnllfQ' },
-                                    { title: 'Chapter 3: Plants and Animals', url: 'https://www.youtube.com/watch?v=zA52fNEnSuk' },
-                                    { title: 'Chapter 4: Food We Eat', url: 'https://www.youtube.com/watch?v=3O0m0s0Xh0k' },
-                                    { title: 'Chapter 5: Water and Air', url: 'https://www.youtube.com/watch?v=8Jpkv_CeyJM' }
-                                ],
-                                fast: [
-                                    { title: 'Chapter 1: My Family', url: 'https://www.youtube.com/watch?v=wMFPe-DwULM' },
-                                    { title: 'Chapter 2: My School', url: 'https://www.youtube.com/watch?v=zPpqVB3k3-o' },
-                                    { title: 'Chapter 3: Plants and Animals', url: 'https://www.youtube.com/watch?v=SUwVmrSh3zY' },
-                                    { title: 'Chapter 4: Food We Eat', url: 'https://www.youtube.com/watch?v=3Ja4j4ltnRw' },
-                                    { title: 'Chapter 5: Water and Air', url: 'https://www.youtube.com/watch?v=9pvL9N1fZoc' }
-                                ]
-                            }
-                        },
-                        {
-                            name: 'Art & Craft',
-                            icon: '🎨',
-                            chapters: {
-                                slow: [
-                                    { title: 'Chapter 1: Colors', url: 'https://www.youtube.com/watch?v=DR-cfDsHCGA' },
-                                    { title: 'Chapter 2: Drawing', url: 'https://www.youtube.com/watch?v=3XPhMXAjplM' },
-                                    { title: 'Chapter 3: Paper Crafts', url: 'https://www.youtube.com/watch?v=QxVX-iE2fYI' },
-                                    { title: 'Chapter 4: Clay Work', url: 'https://www.youtube.com/watch?v=OEbRDtCAFdU' },
-                                    { title: 'Chapter 5: Creative Activities', url: 'https://www.youtube.com/watch?v=uYMNf7r7k2c' }
-                                ],
-                                medium: [
-                                    { title: 'Chapter 1: Colors', url: 'https://www.youtube.com/watch?v=36IBDpTRVNE' },
-                                    { title: 'Chapter 2: Drawing', url: 'https://www.youtube.com/watch?v=hq3yfQnllfQ' },
-                                    { title: 'Chapter 3: Paper Crafts', url: 'https://www.youtube.com/watch?v=zA52fNEnSuk' },
-                                    { title: 'Chapter 4: Clay Work', url: 'https://www.youtube.com/watch?v=3O0m0s0Xh0k' },
-                                    { title: 'Chapter 5: Creative Activities', url: 'https://www.youtube.com/watch?v=8Jpkv_CeyJM' }
-                                ],
-                                fast: [
-                                    { title: 'Chapter 1: Colors', url: 'https://www.youtube.com/watch?v=wMFPe-DwULM' },
-                                    { title: 'Chapter 2: Drawing', url: 'https://www.youtube.com/watch?v=zPpqVB3k3-o' },
-                                    { title: 'Chapter 3: Paper Crafts', url: 'https://www.youtube.com/watch?v=SUwVmrSh3zY' },
-                                    { title: 'Chapter 4: Clay Work', url: 'https://www.youtube.com/watch?v=3Ja4j4ltnRw' },
-                                    { title: 'Chapter 5: Creative Activities', url: 'https://www.youtube.com/watch?v=9pvL9N1fZoc' }
-                                ]
-                            }
-                        }
-                    ]
-                }"""
-
-# Note: Due to message length limits, I'll need to add classes 2-10 in a separate step
-# For now, let's just replace the old structure with a note that we need to add the rest
-
-print(f"Found subjectsData from position {subjects_start} to {subjects_end}")
-print(f"Current length: {subjects_end - subjects_start} characters")
-print("\nNote: Due to size constraints, please manually add classes 2-10")
-print("The structure for Class 1 has been prepared above.")
+# Learning paces and the video URL pool for each; chapter k of every
+# subject links to URL k of its pace's pool
+PACES = ("slow", "medium", "fast")
+
+URL_POOL = {
+    "slow": [
+        "https://www.youtube.com/watch?v=DR-cfDsHCGA",
+        "https://www.youtube.com/watch?v=3XPhMXAjplM",
+        "https://www.youtube.com/watch?v=QxVX-iE2fYI",
+        "https://www.youtube.com/watch?v=OEbRDtCAFdU",
+        "https://www.youtube.com/watch?v=uYMNf7r7k2c",
+    ],
+    "medium": [
+        "https://www.youtube.com/watch?v=36IBDpTRVNE",
+        "https://www.youtube.com/watch?v=hq3yfQnllfQ",
+        "https://www.youtube.com/watch?v=zA52fNEnSuk",
+        "https://www.youtube.com/watch?v=3O0m0s0Xh0k",
+        "https://www.youtube.com/watch?v=8Jpkv_CeyJM",
+    ],
+    "fast": [
+        "https://www.youtube.com/watch?v=wMFPe-DwULM",
+        "https://www.youtube.com/watch?v=zPpqVB3k3-o",
+        "https://www.youtube.com/watch?v=SUwVmrSh3zY",
+        "https://www.youtube.com/watch?v=3Ja4j4ltnRw",
+        "https://www.youtube.com/watch?v=9pvL9N1fZoc",
+    ],
+}
+
+# (subject name, icon, chapter titles) per class, ported verbatim from
+# the live subjectsData blob in eduquest.html
+SUBJECTS_BY_CLASS = {
+    1: [
+        ("Hindi", "🇮🇳", [
+            "Chapter 1: वर्णमाला (Alphabet)",
+            "Chapter 2: शब्द और वाक्य (Words and Sentences)",
+            "Chapter 3: कहानियाँ (Stories)",
+            "Chapter 4: कविताएँ (Poems)",
+            "Chapter 5: लेखन अभ्यास (Writing Practice)",
+        ]),
+        ("English", "📚", [
+            "Chapter 1: Alphabet and Sounds",
+            "Chapter 2: Simple Words",
+            "Chapter 3: Reading Stories",
+            "Chapter 4: Writing Practice",
+            "Chapter 5: Grammar Basics",
+        ]),
+        ("Mathematics", "🔢", [
+            "Chapter 1: Numbers 1-20",
+            "Chapter 2: Addition",
+            "Chapter 3: Subtraction",
+            "Chapter 4: Shapes",
+            "Chapter 5: Measurement",
+        ]),
+        ("Environmental Studies", "🌿", [
+            "Chapter 1: My Family",
+            "Chapter 2: My School",
+            "Chapter 3: Plants and Animals",
+            "Chapter 4: Food We Eat",
+            "Chapter 5: Water and Air",
+        ]),
+        ("Art & Craft", "🎨", [
+            "Chapter 1: Colors",
+            "Chapter 2: Drawing",
+            "Chapter 3: Paper Crafts",
+            "Chapter 4: Clay Work",
+            "Chapter 5: Creative Activities",
+        ]),
+    ],
+    2: [
+        ("Hindi", "🇮🇳", [
+            "Chapter 1: मात्राएँ (Matras)",
+            "Chapter 2: दो अक्षर के शब्द (Two Letter Words)",
+            "Chapter 3: कहानी पढ़ना (Story Reading)",
+            "Chapter 4: कविता (Poetry)",
+            "Chapter 5: लेखन (Writing)",
+        ]),
+        ("English", "📚", [
+            "Chapter 1: Phonics",
+            "Chapter 2: Simple Sentences",
+            "Chapter 3: Reading Comprehension",
+            "Chapter 4: Story Writing",
+            "Chapter 5: Basic Grammar",
+        ]),
+        ("Mathematics", "🔢", [
+            "Chapter 1: Numbers 1-100",
+            "Chapter 2: Addition and Subtraction",
+            "Chapter 3: Multiplication Basics",
+            "Chapter 4: Time",
+            "Chapter 5: Money",
+        ]),
+        ("Environmental Studies", "🌿", [
+            "Chapter 1: Our Body",
+            "Chapter 2: Clothes We Wear",
+            "Chapter 3: Houses We Live In",
+            "Chapter 4: Transport",
+            "Chapter 5: Festivals",
+        ]),
+        ("Art & Craft", "🎨", [
+            "Chapter 1: Color Mixing",
+            "Chapter 2: Patterns",
+            "Chapter 3: Origami",
+            "Chapter 4: Painting",
+            "Chapter 5: Craft Projects",
+        ]),
+    ],
+    3: [
+        ("Hindi", "🇮🇳", [
+            "Chapter 1: Hindi - Topic 1",
+            "Chapter 2: Hindi - Topic 2",
+            "Chapter 3: Hindi - Topic 3",
+            "Chapter 4: Hindi - Topic 4",
+            "Chapter 5: Hindi - Topic 5",
+        ]),
+        ("English", "📚", [
+            "Chapter 1: English - Topic 1",
+            "Chapter 2: English - Topic 2",
+            "Chapter 3: English - Topic 3",
+            "Chapter 4: English - Topic 4",
+            "Chapter 5: English - Topic 5",
+        ]),
+        ("Mathematics", "🔢", [
+            "Chapter 1: Mathematics - Topic 1",
+            "Chapter 2: Mathematics - Topic 2",
+            "Chapter 3: Mathematics - Topic 3",
+            "Chapter 4: Mathematics - Topic 4",
+            "Chapter 5: Mathematics - Topic 5",
+        ]),
+        ("Environmental Studies", "🌿", [
+            "Chapter 1: Environmental Studies - Topic 1",
+            "Chapter 2: Environmental Studies - Topic 2",
+            "Chapter 3: Environmental Studies - Topic 3",
+            "Chapter 4: Environmental Studies - Topic 4",
+            "Chapter 5: Environmental Studies - Topic 5",
+        ]),
+        ("Art & Craft", "🎨", [
+            "Chapter 1: Art & Craft - Topic 1",
+            "Chapter 2: Art & Craft - Topic 2",
+            "Chapter 3: Art & Craft - Topic 3",
+            "Chapter 4: Art & Craft - Topic 4",
+            "Chapter 5: Art & Craft - Topic 5",
+        ]),
+    ],
+    4: [
+        ("Hindi", "🇮🇳", [
+            "Chapter 1: Hindi - Topic 1",
+            "Chapter 2: Hindi - Topic 2",
+            "Chapter 3: Hindi - Topic 3",
+            "Chapter 4: Hindi - Topic 4",
+            "Chapter 5: Hindi - Topic 5",
+        ]),
+        ("English", "📚", [
+            "Chapter 1: English - Topic 1",
+            "Chapter 2: English - Topic 2",
+            "Chapter 3: English - Topic 3",
+            "Chapter 4: English - Topic 4",
+            "Chapter 5: English - Topic 5",
+        ]),
+        ("Mathematics", "🔢", [
+            "Chapter 1: Mathematics - Topic 1",
+            "Chapter 2: Mathematics - Topic 2",
+            "Chapter 3: Mathematics - Topic 3",
+            "Chapter 4: Mathematics - Topic 4",
+            "Chapter 5: Mathematics - Topic 5",
+        ]),
+        ("Environmental Studies", "🌿", [
+            "Chapter 1: Environmental Studies - Topic 1",
+            "Chapter 2: Environmental Studies - Topic 2",
+            "Chapter 3: Environmental Studies - Topic 3",
+            "Chapter 4: Environmental Studies - Topic 4",
+            "Chapter 5: Environmental Studies - Topic 5",
+        ]),
+        ("Computer", "💻", [
+            "Chapter 1: Computer - Topic 1",
+            "Chapter 2: Computer - Topic 2",
+            "Chapter 3: Computer - Topic 3",
+            "Chapter 4: Computer - Topic 4",
+            "Chapter 5: Computer - Topic 5",
+        ]),
+    ],
+    5: [
+        ("Hindi", "🇮🇳", [
+            "Chapter 1: Hindi - Topic 1",
+            "Chapter 2: Hindi - Topic 2",
+            "Chapter 3: Hindi - Topic 3",
+            "Chapter 4: Hindi - Topic 4",
+            "Chapter 5: Hindi - Topic 5",
+        ]),
+        ("English", "📚", [
+            "Chapter 1: English - Topic 1",
+            "Chapter 2: English - Topic 2",
+            "Chapter 3: English - Topic 3",
+            "Chapter 4: English - Topic 4",
+            "Chapter 5: English - Topic 5",
+        ]),
+        ("Mathematics", "🔢", [
+            "Chapter 1: Mathematics - Topic 1",
+            "Chapter 2: Mathematics - Topic 2",
+            "Chapter 3: Mathematics - Topic 3",
+            "Chapter 4: Mathematics - Topic 4",
+            "Chapter 5: Mathematics - Topic 5",
+        ]),
+        ("Environmental Studies", "🌿", [
+            "Chapter 1: Environmental Studies - Topic 1",
+            "Chapter 2: Environmental Studies - Topic 2",
+            "Chapter 3: Environmental Studies - Topic 3",
+            "Chapter 4: Environmental Studies - Topic 4",
+            "Chapter 5: Environmental Studies - Topic 5",
+        ]),
+        ("Computer", "💻", [
+            "Chapter 1: Computer - Topic 1",
+            "Chapter 2: Computer - Topic 2",
+            "Chapter 3: Computer - Topic 3",
+            "Chapter 4: Computer - Topic 4",
+            "Chapter 5: Computer - Topic 5",
+        ]),
+    ],
+    6: [
+        ("Hindi", "🇮🇳", [
+            "Chapter 1: Hindi - Topic 1",
+            "Chapter 2: Hindi - Topic 2",
+            "Chapter 3: Hindi - Topic 3",
+            "Chapter 4: Hindi - Topic 4",
+            "Chapter 5: Hindi - Topic 5",
+        ]),
+        ("English", "📚", [
+            "Chapter 1: English - Topic 1",
+            "Chapter 2: English - Topic 2",
+            "Chapter 3: English - Topic 3",
+            "Chapter 4: English - Topic 4",
+            "Chapter 5: English - Topic 5",
+        ]),
+        ("Mathematics", "🔢", [
+            "Chapter 1: Mathematics - Topic 1",
+            "Chapter 2: Mathematics - Topic 2",
+            "Chapter 3: Mathematics - Topic 3",
+            "Chapter 4: Mathematics - Topic 4",
+            "Chapter 5: Mathematics - Topic 5",
+        ]),
+        ("Science", "🔬", [
+            "Chapter 1: Science - Topic 1",
+            "Chapter 2: Science - Topic 2",
+            "Chapter 3: Science - Topic 3",
+            "Chapter 4: Science - Topic 4",
+            "Chapter 5: Science - Topic 5",
+        ]),
+        ("Social Studies", "🌍", [
+            "Chapter 1: Social Studies - Topic 1",
+            "Chapter 2: Social Studies - Topic 2",
+            "Chapter 3: Social Studies - Topic 3",
+            "Chapter 4: Social Studies - Topic 4",
+            "Chapter 5: Social Studies - Topic 5",
+        ]),
+    ],
+    7: [
+        ("Hindi", "🇮🇳", [
+            "Chapter 1: Hindi - Topic 1",
+            "Chapter 2: Hindi - Topic 2",
+            "Chapter 3: Hindi - Topic 3",
+            "Chapter 4: Hindi - Topic 4",
+            "Chapter 5: Hindi - Topic 5",
+        ]),
+        ("English", "📚", [
+            "Chapter 1: English - Topic 1",
+            "Chapter 2: English - Topic 2",
+            "Chapter 3: English - Topic 3",
+            "Chapter 4: English - Topic 4",
+            "Chapter 5: English - Topic 5",
+        ]),
+        ("Mathematics", "🔢", [
+            "Chapter 1: Mathematics - Topic 1",
+            "Chapter 2: Mathematics - Topic 2",
+            "Chapter 3: Mathematics - Topic 3",
+            "Chapter 4: Mathematics - Topic 4",
+            "Chapter 5: Mathematics - Topic 5",
+        ]),
+        ("Science", "🔬", [
+            "Chapter 1: Science - Topic 1",
+            "Chapter 2: Science - Topic 2",
+            "Chapter 3: Science - Topic 3",
+            "Chapter 4: Science - Topic 4",
+            "Chapter 5: Science - Topic 5",
+        ]),
+        ("Social Studies", "🌍", [
+            "Chapter 1: Social Studies - Topic 1",
+            "Chapter 2: Social Studies - Topic 2",
+            "Chapter 3: Social Studies - Topic 3",
+            "Chapter 4: Social Studies - Topic 4",
+            "Chapter 5: Social Studies - Topic 5",
+        ]),
+    ],
+    8: [
+        ("Hindi", "🇮🇳", [
+            "Chapter 1: Hindi - Topic 1",
+            "Chapter 2: Hindi - Topic 2",
+            "Chapter 3: Hindi - Topic 3",
+            "Chapter 4: Hindi - Topic 4",
+            "Chapter 5: Hindi - Topic 5",
+        ]),
+        ("English", "📚", [
+            "Chapter 1: English - Topic 1",
+            "Chapter 2: English - Topic 2",
+            "Chapter 3: English - Topic 3",
+            "Chapter 4: English - Topic 4",
+            "Chapter 5: English - Topic 5",
+        ]),
+        ("Mathematics", "🔢", [
+            "Chapter 1: Mathematics - Topic 1",
+            "Chapter 2: Mathematics - Topic 2",
+            "Chapter 3: Mathematics - Topic 3",
+            "Chapter 4: Mathematics - Topic 4",
+            "Chapter 5: Mathematics - Topic 5",
+        ]),
+        ("Science", "🔬", [
+            "Chapter 1: Science - Topic 1",
+            "Chapter 2: Science - Topic 2",
+            "Chapter 3: Science - Topic 3",
+            "Chapter 4: Science - Topic 4",
+            "Chapter 5: Science - Topic 5",
+        ]),
+        ("Social Studies", "🌍", [
+            "Chapter 1: Social Studies - Topic 1",
+            "Chapter 2: Social Studies - Topic 2",
+            "Chapter 3: Social Studies - Topic 3",
+            "Chapter 4: Social Studies - Topic 4",
+            "Chapter 5: Social Studies - Topic 5",
+        ]),
+    ],
+    9: [
+        ("Hindi", "🇮🇳", [
+            "Chapter 1: Hindi - Topic 1",
+            "Chapter 2: Hindi - Topic 2",
+            "Chapter 3: Hindi - Topic 3",
+            "Chapter 4: Hindi - Topic 4",
+            "Chapter 5: Hindi - Topic 5",
+        ]),
+        ("English", "📚", [
+            "Chapter 1: English - Topic 1",
+            "Chapter 2: English - Topic 2",
+            "Chapter 3: English - Topic 3",
+            "Chapter 4: English - Topic 4",
+            "Chapter 5: English - Topic 5",
+        ]),
+        ("Mathematics", "🔢", [
+            "Chapter 1: Mathematics - Topic 1",
+            "Chapter 2: Mathematics - Topic 2",
+            "Chapter 3: Mathematics - Topic 3",
+            "Chapter 4: Mathematics - Topic 4",
+            "Chapter 5: Mathematics - Topic 5",
+        ]),
+        ("Science", "🔬", [
+            "Chapter 1: Science - Topic 1",
+            "Chapter 2: Science - Topic 2",
+            "Chapter 3: Science - Topic 3",
+            "Chapter 4: Science - Topic 4",
+            "Chapter 5: Science - Topic 5",
+        ]),
+        ("Social Studies", "🌍", [
+            "Chapter 1: Social Studies - Topic 1",
+            "Chapter 2: Social Studies - Topic 2",
+            "Chapter 3: Social Studies - Topic 3",
+            "Chapter 4: Social Studies - Topic 4",
+            "Chapter 5: Social Studies - Topic 5",
+        ]),
+    ],
+    10: [
+        ("Hindi", "🇮🇳", [
+            "Chapter 1: Hindi - Topic 1",
+            "Chapter 2: Hindi - Topic 2",
+            "Chapter 3: Hindi - Topic 3",
+            "Chapter 4: Hindi - Topic 4",
+            "Chapter 5: Hindi - Topic 5",
+        ]),
+        ("English", "📚", [
+            "Chapter 1: English - Topic 1",
+            "Chapter 2: English - Topic 2",
+            "Chapter 3: English - Topic 3",
+            "Chapter 4: English - Topic 4",
+            "Chapter 5: English - Topic 5",
+        ]),
+        ("Mathematics", "🔢", [
+            "Chapter 1: Mathematics - Topic 1",
+            "Chapter 2: Mathematics - Topic 2",
+            "Chapter 3: Mathematics - Topic 3",
+            "Chapter 4: Mathematics - Topic 4",
+            "Chapter 5: Mathematics - Topic 5",
+        ]),
+        ("Science", "🔬", [
+            "Chapter 1: Science - Topic 1",
+            "Chapter 2: Science - Topic 2",
+            "Chapter 3: Science - Topic 3",
+            "Chapter 4: Science - Topic 4",
+            "Chapter 5: Science - Topic 5",
+        ]),
+        ("Social Studies", "🌍", [
+            "Chapter 1: Social Studies - Topic 1",
+            "Chapter 2: Social Studies - Topic 2",
+            "Chapter 3: Social Studies - Topic 3",
+            "Chapter 4: Social Studies - Topic 4",
+            "Chapter 5: Social Studies - Topic 5",
+        ]),
+    ],
+}
+
+
+def build_subjects_data() -> dict:
+    """Expand the compact tables into the nested subjectsData structure"""
+    return {
+        str(cls): {
+            "subjects": [
+                {
+                    "name": name,
+                    "icon": icon,
+                    "chapters": {
+                        pace: [
+                            {"title": title, "url": URL_POOL[pace][k]}
+                            for k, title in enumerate(chapters)
+                        ]
+                        for pace in PACES
+                    },
+                }
+                for (name, icon, chapters) in subs
+            ]
+        }
+        for cls, subs in SUBJECTS_BY_CLASS.items()
+    }
+
+
+# Compiled once; searched directly against the memory-mapped file.
+# The end pattern stops at subjectsData's own closing brace; the brace
+# and semicolon after it close the enclosing state object and must
+# survive the splice untouched.
+START_PATTERN = re.compile(rb"subjectsData: \{")
+END_PATTERN = re.compile(rb"\}(?=\s*\}\s*;\s*// Motivational quotes)")
+
+# Class keys present in the existing blob, used to refuse a splice that
+# would drop classes the table doesn't cover
+CLASS_KEY_PATTERN = re.compile(rb"'(\d+)': \{")
+
+
+def main():
+    # Memory-map the HTML so the regexes scan the file without reading
+    # it all into a Python string, and search the end pattern from the
+    # start match's offset so the file is walked once
+    with open('eduquest.html', 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        start_match = START_PATTERN.search(mm)
+        if not start_match:
+            print("Could not find subjectsData")
+            exit(1)
+
+        subjects_start = start_match.start()
+
+        end_match = END_PATTERN.search(mm, start_match.end())
+        if not end_match:
+            print("Could not find end of subjectsData")
+            exit(1)
+
+        subjects_end = end_match.end()
+
+        # Never silently drop a class that exists in the live blob but
+        # is missing from SUBJECTS_BY_CLASS
+        existing = {
+            int(m.group(1))
+            for m in CLASS_KEY_PATTERN.finditer(mm, subjects_start, subjects_end)
+        }
+        missing = existing - set(SUBJECTS_BY_CLASS)
+        if missing:
+            print("Refusing to overwrite: eduquest.html has classes "
+                  f"{sorted(missing)} not covered by SUBJECTS_BY_CLASS")
+            exit(1)
+
+        new_blob = "subjectsData: " + json.dumps(
+            build_subjects_data(), ensure_ascii=False, indent=4
+        )
+
+        # Write the pieces to a sibling file and swap it in atomically
+        with open('eduquest.html.new', 'wb') as out:
+            out.write(mm[:subjects_start])
+            out.write(new_blob.encode('utf-8'))
+            out.write(mm[subjects_end:])
 
+        mm.close()
 
+    os.replace('eduquest.html.new', 'eduquest.html')
 
+    print(f"Replaced subjectsData ({subjects_end - subjects_start} -> "
+          f"{len(new_blob)} characters)")
 
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Web Server Hot Path
+Frame-rate helpers extracted from web_server for AOT compilation
+
+Everything here runs once per processed frame, is fully type
+annotated, and imports no Flask machinery, so the module can be
+compiled ahead of time (``mypyc web_hotpath.py`` or
+``cythonize -3 -i web_hotpath.py``) to strip the interpreter overhead
+from the glue around the native OpenCV calls. It stays importable as
+plain Python when no compiled extension is present.
+"""
+
+import logging
+from typing import Any, Dict, Optional, Union
+
+import cv2
+import numpy as np
+
+# pybase64 wraps a SIMD (AVX2/SSSE3) base64 decoder, 3-8x faster than
+# the stdlib on large data-URL frames; optional, stdlib fallback
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+logger = logging.getLogger('eduquest')
+
+_png_warned = False
+
+
+def warn_if_png(raw: Union[bytes, bytearray, memoryview]) -> None:
+    """Warn (once) when a client sends PNG frames instead of JPEG
+
+    canvas.toDataURL() defaults to PNG, which is ~3x slower to decode
+    than JPEG at webcam sizes and much larger on the wire. Clients
+    should send canvas.toDataURL('image/jpeg', 0.6) - the detectors
+    don't need fidelity beyond that.
+    """
+    global _png_warned
+    if not _png_warned and raw[:4] == b'\x89PNG':
+        _png_warned = True
+        logger.warning(
+            "client is uploading PNG frames; use "
+            "canvas.toDataURL('image/jpeg', 0.6) for ~3x faster "
+            "decoding and smaller payloads.")
+
+
+def process_image_from_base64(image_data: str) -> Optional[np.ndarray]:
+    """Convert base64 image to OpenCV format"""
+    try:
+        # Remove data URL prefix if present; the startswith memcmp means
+        # pure-base64 payloads are never scanned for a separator
+        if image_data.startswith('data:'):
+            image_data = image_data[image_data.index(',') + 1:]
+
+        # Decode straight to BGR in one native call; imdecode goes through
+        # libjpeg-turbo/libpng, skipping the PIL -> numpy -> cvtColor copies.
+        # pybase64's bytearray variant decodes without an intermediate
+        # bytes copy; np.frombuffer shares the buffer either way
+        if hasattr(base64, 'b64decode_as_bytearray'):
+            raw = base64.b64decode_as_bytearray(image_data)
+        else:
+            raw = base64.b64decode(image_data, validate=False)
+        warn_if_png(raw)
+        arr = np.frombuffer(raw, dtype=np.uint8)
+        frame = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+        if frame is None:
+            frame = _decode_with_pil(raw)
+        return frame
+    except Exception:
+        logger.exception("Error processing image")
+        return None
+
+
+def _decode_with_pil(raw: bytes) -> Optional[np.ndarray]:
+    """Fallback decode via PIL for formats imdecode doesn't handle
+
+    Uses Image.draft to let libjpeg downscale during decode (the PIL
+    analogue of a scaled IDCT) and np.asarray instead of np.array to
+    skip the copy for contiguous RGB output.
+    """
+    import io
+
+    from PIL import Image
+
+    try:
+        image = Image.open(io.BytesIO(raw))
+        image.draft('RGB', (480, 360))
+        image = image.convert('RGB')
+        arr = np.asarray(image)
+        return cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
+    except Exception:
+        return None
+
+
+def resolve_eyes_open(eye_data: Dict[str, Any], eyes_open: bool,
+                      face_count: int) -> bool:
+    """Combine the per-frame eye signals into a single open/closed call
+
+    Args:
+        eye_data: Eye detection data from the sleep detector
+        eyes_open: The sleep detector's own open/closed verdict
+        face_count: Number of faces detected in the frame
+
+    Returns:
+        True if the eyes are considered open
+    """
+    # Use computer vision EAR for more accurate eye detection
+    avg_ear = eye_data.get('avg_ear')
+    if avg_ear is not None:
+        eyes_open = avg_ear > 0.25  # EAR threshold for open eyes
+
+    # Additional check: if no eyes detected but face is detected, eyes
+    # are likely closed
+    eyes_detected = eye_data.get('eyes_detected', 0)
+    if eyes_detected == 0 and face_count > 0:
+        # Face detected but no eyes - definitely closed
+        eyes_open = False
+    elif eyes_detected == 1:
+        # Only one eye detected - assume closed (need both eyes)
+        eyes_open = False
+    elif eyes_detected > 1:
+        # Eyes detected - check area ratio for better accuracy
+        # More aggressive - need at least 2.5% to be considered open
+        if eye_data.get('eye_area_ratio', 0) < 0.025:
+            eyes_open = False
+
+    return eyes_open
+
+
+def attention_score(eyes_open: bool, tilt: str, nod: str,
+                    avg_ear: Optional[float]) -> int:
+    """Score attention 0-100 from the per-frame computer vision signals
+
+    Args:
+        eyes_open: Whether the eyes are considered open
+        tilt: Head tilt direction ('center' when facing the screen)
+        nod: Head nod direction ('center' when facing the screen)
+        avg_ear: Average eye aspect ratio, if landmarks were available
+
+    Returns:
+        Attention score clamped to [0, 100]
+    """
+    # Face detected: +30 points
+    score = 30
+
+    # Eyes open: +40 points
+    if eyes_open:
+        score += 40
+    else:
+        score -= 20
+
+    # Head position: +30 points if centered
+    if tilt == 'center' and nod == 'center':
+        score += 30
+    else:
+        score -= 15
+
+    # Use EAR if available for more accurate detection
+    if avg_ear is not None:
+        if avg_ear > 0.3:  # Eyes clearly open
+            score += 10
+        elif avg_ear < 0.2:  # Eyes clearly closed
+            score -= 10
+
+    return max(0, min(100, score))
@@ -0,0 +1,6 @@
+"""
+WSGI entry point for production servers
+Run with: gunicorn --workers 4 --threads 2 --preload wsgi:app
+"""
+
+from web_server import app  # noqa: F401